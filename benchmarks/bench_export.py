@@ -0,0 +1,114 @@
+"""Time and peak RSS of quiz PDF exports of 10, 1,000 and 10,000 questions.
+
+Each measurement runs in a fresh interpreter so peak RSS is not polluted by earlier runs.
+The streaming engine is compared with the previous reportlab canvas + BytesIO approach:
+
+    python benchmarks/bench_export.py --sizes 10 1000 10000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_questions(count):
+    return [
+        {
+            "type": "mcq",
+            "question": f"Question {i}: which process converts light energy into chemical energy stored in "
+                        f"glucose, releasing oxygen as a by-product in the chloroplasts of plant cells?",
+            "options": ["Photosynthesis", "Respiration", "Fermentation", "Transpiration"],
+            "answer": "Photosynthesis",
+        }
+        for i in range(count)
+    ]
+
+
+def export_streaming(questions, path):
+    from quizwhiz.export import write_pdf
+    from quizwhiz.question_types import get_question_type
+
+    with open(path, "wb") as out:
+        write_pdf(questions, get_question_type("mcq"), out)
+
+
+def export_canvas(questions, path):
+    """The former generate_pdf: whole document held in a BytesIO, one drawString per line."""
+    from io import BytesIO
+
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    pdf_canvas = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    y_position = height - 50
+    pdf_canvas.setFont("Helvetica", 10)
+    for i, question in enumerate(questions):
+        if y_position < 50:
+            pdf_canvas.showPage()
+            y_position = height - 50
+        pdf_canvas.drawString(50, y_position, f"Q{i + 1}: {question['question']}")
+        y_position -= 15
+        for option in question["options"]:
+            pdf_canvas.drawString(70, y_position, f"- {option}")
+            y_position -= 15
+        y_position -= 10
+    pdf_canvas.save()
+    with open(path, "wb") as out:
+        out.write(buffer.getvalue())
+
+
+ENGINES = {"streaming": export_streaming, "canvas": export_canvas}
+
+
+def run_one(engine, count):
+    """Child process: export count questions and print time, peak RSS and file size as JSON."""
+    questions = make_questions(count)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "quiz.pdf")
+        baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        ENGINES[engine](questions, path)
+        elapsed = time.perf_counter() - started
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        size = os.path.getsize(path)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    print(json.dumps({"seconds": elapsed, "peak_rss": peak_rss * scale,
+                      "rss_growth": (peak_rss - baseline_rss) * scale, "bytes": size}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--child", nargs=2, metavar=("ENGINE", "COUNT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_one(args.child[0], int(args.child[1]))
+        return
+
+    mb = 1024 * 1024
+    print(f"{'engine':<10} {'questions':>9} {'seconds':>8} {'peak RSS MB':>12} {'RSS growth MB':>14} {'PDF MB':>7}")
+    for count in args.sizes:
+        for engine in args.engines:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", engine, str(count)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{engine:<10} {count:>9} {result['seconds']:>8.2f} {result['peak_rss'] / mb:>12.1f} "
+                  f"{result['rss_growth'] / mb:>14.1f} {result['bytes'] / mb:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Answers graded per second for a fill-in-the-blank cohort.
+
+Builds a quiz of 20 questions and a cohort whose answers are a realistic mix of exact,
+bracketed, misspelled and wrong answers, then grades it as one batch with
+Grader.grade_cohort and, for comparison, one answer at a time with Grader.is_correct:
+
+    python benchmarks/bench_grading.py --students 30 1000 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quizwhiz.grading import Grader, normalize_answer  # noqa: E402
+
+ANSWERS = [
+    "photosynthesis", "mitochondria", "Paris", "Isaac Newton", "oxygen", "chlorophyll", "the Nile",
+    "acceleration", "1789", "Marie Curie", "nucleus", "evaporation", "gravity", "Jupiter",
+    "democracy", "Shakespeare", "carbon dioxide", "the Pacific Ocean", "osmosis", "Mount Everest",
+]
+
+
+def misspell(answer, rng):
+    chars = list(answer)
+    i = rng.randrange(len(chars))
+    operation = rng.choice(("drop", "swap", "double"))
+    if operation == "drop" and len(chars) > 3:
+        del chars[i]
+    elif operation == "swap" and i + 1 < len(chars):
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    else:
+        chars.insert(i, chars[i])
+    return "".join(chars)
+
+
+def make_cohort(students, seed=0):
+    rng = random.Random(seed)
+    questions = [{"question": f"Q{i} _____", "answer": f"[{answer}]"} for i, answer in enumerate(ANSWERS)]
+    submissions = []
+    for _ in range(students):
+        answers = {}
+        for i, answer in enumerate(ANSWERS):
+            roll = rng.random()
+            if roll < 0.5:
+                answers[i] = answer
+            elif roll < 0.65:
+                answers[i] = f"[{answer.upper()}]."
+            elif roll < 0.85:
+                answers[i] = misspell(answer, rng)
+            elif roll < 0.95:
+                answers[i] = rng.choice(ANSWERS)
+            else:
+                answers[i] = ""
+        submissions.append(answers)
+    return questions, submissions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, nargs="+", default=[30, 1000, 10000])
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    grader = Grader(args.threshold)
+    grader.grade_cohort(*make_cohort(1))  # Import numpy outside the timings
+    print(f"{'students':>8} {'answers':>8} {'batch/s':>12} {'per-answer/s':>13} {'correct':>8} {'agree':>6}")
+    for students in args.students:
+        questions, submissions = make_cohort(students)
+        answers = students * len(questions)
+
+        normalize_answer.cache_clear()
+        started = time.perf_counter()
+        graded = grader.grade_cohort(questions, submissions)
+        batch_rate = answers / (time.perf_counter() - started)
+
+        normalize_answer.cache_clear()
+        started = time.perf_counter()
+        single = [[grader.is_correct(q, submission.get(i)) for i, q in enumerate(questions)]
+                  for submission in submissions]
+        single_rate = answers / (time.perf_counter() - started)
+
+        agree = (graded == single).all()
+        print(f"{students:>8} {answers:>8} {batch_rate:>12,.0f} {single_rate:>13,.0f} "
+              f"{graded.mean():>8.0%} {'yes' if agree else 'NO':>6}")
+
+
+if __name__ == "__main__":
+    main()
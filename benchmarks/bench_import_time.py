@@ -0,0 +1,115 @@
+"""Import-time regression guard for the Streamlit entry points.
+
+Runs `python -X importtime` in fresh interpreters for what app.py and the pages import,
+reports the slowest modules, checks that no ML/PDF library is loaded at import time and
+optionally times warm Streamlit reruns of each page:
+
+    python benchmarks/bench_import_time.py --budget-ms 1500 --reruns 20
+
+Exits non-zero when a heavy module is imported eagerly or the budget is exceeded.
+"""
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scripts Streamlit executes; what they import is read from their source, not listed here
+ENTRY_POINTS = ("app.py", "pages/mcq.py", "pages/fill_in_blanks.py")
+
+# Must only be imported on first use, never while a page is loading
+HEAVY_MODULES = ("langchain", "langchain_google_genai", "google.generativeai", "PyPDF2", "reportlab", "dotenv")
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def entry_point_imports(entry_point):
+    """Modules imported at the top level of an entry point script, in order."""
+    with open(os.path.join(ROOT, entry_point)) as script:
+        tree = ast.parse(script.read(), entry_point)
+    modules = []
+    nodes = list(tree.body)
+    while nodes:
+        node = nodes.pop(0)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            continue  # Imported when called, not when the page loads
+        nodes[:0] = ast.iter_child_nodes(node)
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure(modules):
+    """Return (total_ms, [(cumulative_ms, module), ...], [heavy modules]) for a cold import."""
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=ROOT),
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr)
+
+    top_level = []
+    imported = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        imported.append(name)
+        if indent == 1:
+            top_level.append((cumulative_us / 1000, name))
+    heavy = sorted({name for name in imported if any(
+        name == prefix or name.startswith(prefix + ".") for prefix in HEAVY_MODULES
+    )})
+    return sum(ms for ms, _ in top_level), sorted(top_level, reverse=True), heavy
+
+
+def time_reruns(page, reruns):
+    """Average wall time of a warm Streamlit rerun of page, using the offline LLM backend."""
+    os.environ.setdefault("QUIZWHIZ_LLM_BACKEND", "stub")
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=60).run()
+    started = time.perf_counter()
+    for _ in range(reruns):
+        app.run()
+    return (time.perf_counter() - started) / reruns * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if a cold import takes longer")
+    parser.add_argument("--top", type=int, default=8, help="number of slowest modules to list")
+    parser.add_argument("--reruns", type=int, default=0, help="also time this many warm reruns per page")
+    args = parser.parse_args()
+
+    failed = False
+    for entry_point in ENTRY_POINTS:
+        total_ms, slowest, heavy = measure(entry_point_imports(entry_point))
+        print(f"{entry_point}: {total_ms:.1f} ms cold import")
+        for ms, name in slowest[:args.top]:
+            print(f"  {ms:>8.1f} ms  {name}")
+        if heavy:
+            failed = True
+            print(f"  FAIL: imported eagerly: {', '.join(heavy)}")
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            failed = True
+            print(f"  FAIL: over the {args.budget_ms:.0f} ms budget")
+
+    if args.reruns:
+        for page in ENTRY_POINTS:
+            print(f"{page}: {time_reruns(page, args.reruns):.1f} ms per warm rerun")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measure LLMClient throughput and tail latency against the in-process stub backend.
+
+No network access is needed; the stub simulates log-normal latency and transient failures:
+
+    python benchmarks/bench_llm_client.py --requests 200 --concurrency 1 4 16
+"""
+import argparse
+import functools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quizwhiz.llm import LLMClient, StubBackend  # noqa: E402
+
+PROMPT = """
+    Generate exactly 5 high-quality fill-in-the-blank questions based **only** on the provided text.
+
+    **Text for Reference:**
+    Request {i}. Photosynthesis converts sunlight, water and carbon dioxide into glucose and oxygen.
+
+    **Generate the Questions Below (Follow the Format Strictly):**
+    """
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency", type=float, default=0.05, help="median stub latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    prompts = [PROMPT.format(i=i) for i in range(args.requests)]
+    backend = functools.partial(StubBackend, latency=args.latency, failure_rate=args.failure_rate)
+
+    print(f"{'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'retries':>8} {'tokens':>8}")
+    for concurrency in args.concurrency:
+        client = LLMClient(backend, max_concurrency=concurrency, backoff=args.latency)
+        started = time.perf_counter()
+        client.complete_many(prompts)
+        elapsed = time.perf_counter() - started
+        stats = client.stats()
+        print(
+            f"{concurrency:>11} {args.requests / elapsed:>8.1f} {stats['p50_latency'] * 1000:>8.1f} "
+            f"{stats['p99_latency'] * 1000:>8.1f} {stats['retries']:>8} "
+            f"{stats['prompt_tokens'] + stats['completion_tokens']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
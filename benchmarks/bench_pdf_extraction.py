@@ -0,0 +1,96 @@
+"""Compare the original serial extraction loop with the parallel CachedPdf extraction engine.
+
+Synthetic PDFs are generated locally with reportlab, so no sample documents are needed:
+
+    python benchmarks/bench_pdf_extraction.py --pages 100 300 600
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from PyPDF2 import PdfReader
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quizwhiz.cache import DiskCache  # noqa: E402
+from quizwhiz.extraction import CachedPdf  # noqa: E402
+
+SENTENCE = "The mitochondria is the powerhouse of the cell and produces energy in the form of ATP. "
+
+
+def make_pdf(num_pages, lines_per_page=45):
+    """Build a text PDF with num_pages pages of filler paragraphs."""
+    buffer = BytesIO()
+    pdf_canvas = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    for page in range(num_pages):
+        pdf_canvas.setFont("Helvetica", 10)
+        y_position = height - 50
+        for line in range(lines_per_page):
+            pdf_canvas.drawString(50, y_position, f"{page + 1}.{line + 1} {SENTENCE}")
+            y_position -= 15
+        pdf_canvas.showPage()
+    pdf_canvas.save()
+    return buffer.getvalue()
+
+
+def serial_extract(data):
+    """The original extraction loop: one page at a time with repeated string concatenation."""
+    text = ""
+    pdf_reader = PdfReader(BytesIO(data))
+    for i in range(len(pdf_reader.pages)):
+        text += pdf_reader.pages[i].extract_text() or ""
+    return text.strip()
+
+
+def parallel_extract(data, cache, workers):
+    cached_pdf = CachedPdf(data, cache=cache)
+    return "".join(cached_pdf.iter_page_texts(1, cached_pdf.num_pages, max_workers=workers)).strip()
+
+
+def first_page_latency(data, cache, workers):
+    cached_pdf = CachedPdf(data, cache=cache)
+    started = time.perf_counter()
+    next(cached_pdf.iter_page_texts(1, cached_pdf.num_pages, max_workers=workers))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 300])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"workers={args.workers}")
+    print(f"{'pages':>6} {'serial s':>9} {'parallel s':>11} {'speedup':>8} {'first page s':>13} {'warm s':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_pages in args.pages:
+            data = make_pdf(num_pages)
+
+            started = time.perf_counter()
+            expected = serial_extract(data)
+            serial = time.perf_counter() - started
+
+            cache = DiskCache(os.path.join(tmp, f"cold-{num_pages}.sqlite"))
+            started = time.perf_counter()
+            result = parallel_extract(data, cache, args.workers)
+            parallel = time.perf_counter() - started
+            assert result == expected, "parallel extraction diverged from the serial path"
+
+            first = first_page_latency(data, DiskCache(os.path.join(tmp, f"first-{num_pages}.sqlite")), args.workers)
+
+            # Second run against the populated cache never touches PdfReader
+            started = time.perf_counter()
+            parallel_extract(data, cache, args.workers)
+            warm = time.perf_counter() - started
+
+            print(f"{num_pages:>6} {serial:>9.2f} {parallel:>11.2f} {serial / parallel:>7.1f}x {first:>13.3f} {warm:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""End-to-end benchmark of the MCQ and fill-in-the-blank pipelines on synthetic corpora.
+
+Seeded PDF corpora (10 to 1,000 pages of varied sentences under section headings) are
+generated locally with reportlab. Each run ingests one corpus, generates questions from a
+replayable fake model, grades a synthetic cohort and exports the quiz PDF. The model is
+the in-process stub backend, with log-normal latency and a share of responses that come
+back malformed (truncated, chatty or missing answers); both are seeded, so a run can be
+repeated exactly:
+
+    python benchmarks/bench_pipeline.py --pages 10 100 1000 --repeat 5
+    python benchmarks/bench_pipeline.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_pipeline.py --baseline benchmarks/baseline.json
+
+Every run happens in a fresh process with empty caches. Per-stage times are read from
+quizwhiz.metrics, and peak memory is the largest RSS of that process or its extraction
+workers. The report gives per-stage throughput with p50/p99 over the repeats. Some stages
+include others: ingest covers extract and chunk, and generate covers parse. With
+--baseline, stages more than --tolerance slower than the stored run, or runs with that
+much more peak memory, are listed as regressions and the exit status is 1. Baselines
+hold timings, so compare only against one recorded on the same machine.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+KINDS = ("mcq", "fill_in_blank")
+
+# Work each stage's throughput is measured in (per second)
+UNITS = {
+    "ingest": "pages", "extract": "pages", "chunk": "pages", "retrieve": "chunks", "generate": "questions",
+    "parse": "questions", "grade": "answers", "export": "questions",
+}
+
+# Stage time differences below this are noise, whatever the ratio
+NOISE_SECONDS = 0.005
+
+SUBJECTS = [
+    "The mitochondrion", "Photosynthesis", "The Treaty of Westphalia", "Plate tectonics", "The Krebs cycle",
+    "Supply and demand", "Newton's second law", "The French Revolution", "Natural selection", "Osmosis",
+    "The Industrial Revolution", "Quantum tunnelling", "The water cycle", "Inflation", "The Renaissance",
+]
+VERBS = ["regulates", "explains", "transformed", "depends on", "produces", "limits", "accelerates", "describes"]
+OBJECTS = [
+    "cellular energy", "atmospheric carbon", "European borders", "continental drift", "market prices",
+    "the motion of bodies", "political authority", "genetic variation", "water transport", "industrial output",
+    "electron behaviour", "rainfall patterns", "purchasing power", "artistic patronage", "glucose metabolism",
+]
+CLAUSES = [
+    "according to most textbooks", "in temperate climates", "during the eighteenth century",
+    "under laboratory conditions", "in almost every living cell", "when interest rates rise",
+    "over geological time scales", "as later experiments confirmed",
+]
+
+
+def sentence(rng):
+    return f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(CLAUSES)}."
+
+
+def make_corpus(num_pages, seed=0):
+    """Build a text PDF of num_pages pages, with a section heading every few pages."""
+    rng = random.Random(f"{num_pages}:{seed}")
+    buffer = BytesIO()
+    pdf_canvas = canvas.Canvas(buffer, pagesize=letter)
+    _, height = letter
+    for page in range(num_pages):
+        y_position = height - 50
+        if page % 4 == 0:
+            pdf_canvas.setFont("Helvetica-Bold", 14)
+            pdf_canvas.drawString(50, y_position, f"Chapter {page // 4 + 1}. {rng.choice(SUBJECTS)[4:].strip()}")
+            y_position -= 30
+        pdf_canvas.setFont("Helvetica", 10)
+        while y_position > 50:
+            pdf_canvas.drawString(50, y_position, sentence(rng) + " " + sentence(rng))
+            y_position -= 15
+        pdf_canvas.showPage()
+    pdf_canvas.save()
+    return buffer.getvalue()
+
+
+def malform(text, rng):
+    """Damage a model response the ways real models do."""
+    damage = rng.choice(("truncate", "chatter", "drop_answers", "fence"))
+    if damage == "truncate":
+        return text[:rng.randrange(len(text) // 4, len(text))] if text else text
+    if damage == "chatter":
+        return "Sure! Here are the questions you asked for:\n\n" + text + "\n\nLet me know if you need more."
+    if damage == "drop_answers":
+        return "\n".join(line for line in text.splitlines() if not line.lower().startswith("answer:")
+                         and rng.random() > 0.2)
+    return "```\n" + text + "\n```"
+
+
+class MalformingLLM:
+    """Wraps FakeLLM so that malformed_rate of the responses, chosen by prompt and seed, are damaged."""
+
+    def __init__(self, llm, malformed_rate, seed):
+        self.llm = llm
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+
+    def __call__(self, prompt):
+        text = self.llm(prompt)
+        rng = random.Random(f"{self.seed}:{prompt}")
+        return malform(text, rng) if rng.random() < self.malformed_rate else text
+
+
+def make_cohort(questions, students, seed):
+    """Answers of a cohort: mostly right, some blank or wrong, as {index: answer} per student."""
+    rng = random.Random(seed)
+    cohort = []
+    for _ in range(students):
+        answers = {}
+        for index, question in enumerate(questions):
+            roll = rng.random()
+            if roll < 0.7:
+                answers[index] = question["answer"]
+            elif roll < 0.9:
+                options = question.get("options") or [question["answer"][::-1]]
+                answers[index] = rng.choice(options)
+        cohort.append(answers)
+    return cohort
+
+
+def run_once(config):
+    """One cold pipeline run in this process; return its measurements as a dict."""
+    from quizwhiz.export import generate_pdf
+    from quizwhiz.ingestion import Source, ingest
+    from quizwhiz.llm import LLMClient, StubBackend
+    from quizwhiz.metrics import metrics
+    from quizwhiz.pipeline import stream_questions
+    from quizwhiz.question_types import get_question_type
+    from quizwhiz.streaming import ParseStats
+
+    def backend(model, temperature):
+        stub = StubBackend(model, temperature, latency=config["latency"], failure_rate=config["failure_rate"])
+        stub._llm = MalformingLLM(stub._llm, config["malformed_rate"], config["seed"])
+        return stub
+
+    client = LLMClient(backend, max_concurrency=config["concurrency"], backoff=config["latency"])
+    question_type = get_question_type(config["kind"])
+    llm = client.bind(model=question_type.model, temperature=question_type.temperature)
+
+    started = time.perf_counter()
+    chunks = ingest([Source(config["pdf"])])
+    stats = ParseStats()
+    questions = list(stream_questions(chunks, config["kind"], config["questions"], llm=llm, stats=stats,
+                                      retrieve=config["retrieve"]))
+    cohort = make_cohort(questions, config["students"], config["seed"])
+    with metrics.timer("grade"):
+        question_type.grade_cohort(questions, cohort)
+    generate_pdf(questions, question_type)
+    wall = time.perf_counter() - started
+
+    stages = {dict(labels)["stage"]: histogram.sum for (name, labels), histogram in metrics.histograms.items()
+              if name == "quizwhiz_stage_seconds"}
+    work = {"pages": config["pages"], "chunks": len(chunks), "questions": len(questions),
+            "answers": len(questions) * config["students"]}
+    llm_stats = client.stats()
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return {
+        "wall": wall, "stages": stages, "work": work, "parse": stats.as_dict(), "peak_mb": peak_kb / 1024,
+        "llm_p50": llm_stats.get("p50_latency", 0.0), "llm_p99": llm_stats.get("p99_latency", 0.0),
+    }
+
+
+def run_child(config, workdir):
+    """Run run_once in a fresh interpreter with empty caches and return its result."""
+    with tempfile.TemporaryDirectory(dir=workdir) as state:
+        env = dict(os.environ, PYTHONPATH=ROOT, QUIZWHIZ_CACHE_DIR=os.path.join(state, "cache"),
+                   QUIZWHIZ_DB=os.path.join(state, "bench.sqlite"), QUIZWHIZ_OCR="0")
+        output = subprocess.run([sys.executable, __file__, "--child", json.dumps(config)], env=env, cwd=state,
+                                check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def quantile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(runs):
+    """Fold repeated runs into per-stage p50/p99 seconds and throughput at the median."""
+    stages = {}
+    for stage in sorted({stage for run in runs for stage in run["stages"]}):
+        times = [run["stages"].get(stage, 0.0) for run in runs]
+        p50 = quantile(times, 0.5)
+        unit = UNITS.get(stage, "pages")
+        amount = runs[0]["work"][unit]
+        stages[stage] = {"p50": p50, "p99": quantile(times, 0.99), "throughput": amount / p50 if p50 else 0.0,
+                         "unit": unit}
+    return {
+        "stages": stages,
+        "wall": quantile([run["wall"] for run in runs], 0.5),
+        "peak_mb": max(run["peak_mb"] for run in runs),
+        "questions": runs[0]["work"]["questions"],
+        "rejected": runs[0]["parse"]["rejected"],
+        "llm_p50": quantile([run["llm_p50"] for run in runs], 0.5),
+        "llm_p99": quantile([run["llm_p99"] for run in runs], 0.99),
+    }
+
+
+def report(name, result):
+    print(f"\n{name}: {result['questions']} questions, {result['rejected']} rejected items, "
+          f"wall {result['wall']:.2f} s, peak RSS {result['peak_mb']:.0f} MB, "
+          f"model call p50/p99 {result['llm_p50'] * 1000:.0f}/{result['llm_p99'] * 1000:.0f} ms")
+    print(f"  {'stage':<10} {'throughput':>25} {'p50 ms':>9} {'p99 ms':>9}")
+    for stage, row in result["stages"].items():
+        print(f"  {stage:<10} {row['throughput']:>12.1f} {row['unit'] + '/s':<12} "
+              f"{row['p50'] * 1000:>9.1f} {row['p99'] * 1000:>9.1f}")
+
+
+def compare(results, baseline, tolerance):
+    """Print how results differ from the baseline and return the regressions found."""
+    regressions = []
+    print(f"\nCompared with baseline (tolerance {tolerance:.0%}):")
+    for name, result in results.items():
+        stored = baseline.get(name)
+        if stored is None:
+            print(f"  {name}: not in baseline")
+            continue
+        for stage, row in result["stages"].items():
+            before = stored["stages"].get(stage)
+            if before is None:
+                continue
+            change = row["p50"] / before["p50"] - 1 if before["p50"] else 0.0
+            slower = change > tolerance and row["p50"] - before["p50"] > NOISE_SECONDS
+            print(f"  {name:<22} {stage:<10} {before['p50'] * 1000:>9.1f} -> {row['p50'] * 1000:>9.1f} ms "
+                  f"{change:>+7.1%}{'  REGRESSION' if slower else ''}")
+            if slower:
+                regressions.append(f"{name} {stage} p50 {change:+.1%}")
+        growth = result["peak_mb"] / stored["peak_mb"] - 1
+        if growth > tolerance:
+            print(f"  {name:<22} peak RSS {stored['peak_mb']:.0f} -> {result['peak_mb']:.0f} MB {growth:+.1%}"
+                  f"  REGRESSION")
+            regressions.append(f"{name} peak RSS {growth:+.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000], help="corpus sizes")
+    parser.add_argument("--kinds", nargs="+", default=list(KINDS), choices=KINDS)
+    parser.add_argument("--repeat", type=int, default=5, help="cold runs per corpus and quiz type")
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--students", type=int, default=200, help="cohort size for the grading stage")
+    parser.add_argument("--latency", type=float, default=0.05, help="median model latency in seconds")
+    parser.add_argument("--malformed-rate", type=float, default=0.1, help="share of malformed responses")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="share of failed first attempts")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--retrieve", action="store_true", help="select chunks by relevance")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="compare with this stored result file")
+    parser.add_argument("--save-baseline", help="store the results in this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(json.loads(args.child))))
+        return
+
+    settings = {key: getattr(args, key) for key in
+                ("questions", "students", "latency", "malformed_rate", "failure_rate", "concurrency", "retrieve",
+                 "seed")}
+    print("settings: " + ", ".join(f"{key}={value}" for key, value in settings.items()))
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for num_pages in args.pages:
+            pdf_path = os.path.join(workdir, f"corpus-{num_pages}.pdf")
+            with open(pdf_path, "wb") as corpus:
+                corpus.write(make_corpus(num_pages, args.seed))
+            for kind in args.kinds:
+                config = dict(settings, kind=kind, pdf=pdf_path, pages=num_pages)
+                name = f"{kind}/{num_pages}"
+                results[name] = summarize([run_child(config, workdir) for _ in range(args.repeat)])
+                report(name, results[name])
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as stored:
+            json.dump({"settings": settings, "results": results}, stored, indent=2)
+        print(f"\nbaseline saved to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as stored:
+            baseline = json.load(stored)
+        if baseline["settings"] != settings:
+            print("\nwarning: the baseline was recorded with different settings")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): " + "; ".join(regressions))
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Load test of quiz taking: server CPU per answer with and without fragment reruns.
+
+Starts the Streamlit app (offline LLM backend, a throwaway database holding one saved
+quiz) once with QUIZWHIZ_FRAGMENTS=1 and once with QUIZWHIZ_FRAGMENTS=0. Simulated
+browser sessions connect over the app's websocket, load the quiz on the MCQ page and
+then change answers the way the frontend reports them. With fragments a change only
+reruns the question it belongs to, otherwise the whole page runs again:
+
+    python benchmarks/bench_sessions.py --sessions 20 --answers 25 --questions 20
+
+Reports server CPU milliseconds per interaction (read from /proc, or psutil when it is
+installed) and client-side latency percentiles for each mode.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DONE = ("FINISHED_SUCCESSFULLY", "FINISHED_FRAGMENT_RUN_SUCCESSFULLY")
+
+
+def cpu_seconds(pid):
+    """User plus system CPU time consumed so far by process pid."""
+    try:
+        import psutil
+    except ImportError:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    times = psutil.Process(pid).cpu_times()
+    return times.user + times.system
+
+
+def make_quiz(db_path, num_questions):
+    """Save a synthetic MCQ quiz in a fresh database."""
+    os.environ["QUIZWHIZ_DB"] = db_path
+    from quizwhiz.store import QuizStore
+
+    store = QuizStore(db_path)
+    questions = [
+        {"type": "mcq", "question": f"Which statement about topic {i} is correct?",
+         "options": [f"Statement {i}.{k}" for k in range(4)], "answer": f"Statement {i}.0"}
+        for i in range(num_questions)
+    ]
+    store.save_document("bench", "bench.pdf")
+    store.save_quiz("mcq", questions, doc_hash="bench", start_page=1, end_page=1)
+    store.close()
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class Session:
+    """One simulated browser tab talking the Streamlit websocket protocol."""
+
+    def __init__(self, url):
+        self.url = url
+        self.widgets = {}  # widget id -> WidgetState the frontend would send
+        self.elements = {}  # label -> (element proto, fragment id) of the latest run
+        self.page_hash = ""
+
+    async def connect(self):
+        import websockets
+
+        self.ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def rerun(self, fragment_id="", trigger=None):
+        """Send a rerun like the frontend does and wait until the server finishes it."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        message = BackMsg()
+        state = message.rerun_script
+        state.page_script_hash = self.page_hash
+        state.fragment_id = fragment_id
+        state.widget_states.widgets.extend(self.widgets.values())
+        if trigger is not None:
+            state.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+        await self.ws.send(message.SerializeToString())
+
+        while True:
+            raw = await self.ws.recv()
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "navigation":
+                self.pages = {page.url_pathname: page.page_script_hash for page in forward.navigation.app_pages}
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                widget = getattr(element, element.WhichOneof("type"))
+                if hasattr(widget, "label") and hasattr(widget, "id"):
+                    self.elements.setdefault(widget.label, {})[widget.id] = (widget, forward.delta.fragment_id)
+            elif kind == "script_finished":
+                status = ForwardMsg.ScriptFinishedStatus.Name(forward.script_finished)
+                if status in DONE:
+                    return
+
+    def widget(self, label, index=0):
+        """The index-th widget with this label in the order the page created them."""
+        return list(self.elements[label].values())[index]
+
+    def set_radio(self, label, value, index=0):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget, fragment_id = self.widget(label, index)
+        self.widgets[widget.id] = WidgetState(id=widget.id, string_value=value)
+        return fragment_id
+
+    async def open_quiz(self, page_name):
+        await self.rerun()  # The first run of the main page lists the app's pages
+        self.page_hash = self.pages[page_name]
+        await self.rerun()
+        self.set_radio("Choose an option", "Take Quiz")
+        await self.rerun()
+        button, _ = self.widget("Load Quiz")
+        await self.rerun(trigger=button.id)
+
+    async def answer(self, rng):
+        """Pick a new answer for a random question; return the client-side latency."""
+        count = len(self.elements["Choose an answer:"])
+        index = rng.randrange(count)
+        widget, _ = self.widget("Choose an answer:", index)
+        fragment_id = self.set_radio("Choose an answer:", rng.choice(widget.options), index)
+        started = time.perf_counter()
+        await self.rerun(fragment_id=fragment_id)
+        return time.perf_counter() - started
+
+
+async def drive(url, sessions, answers, seed):
+    clients = [Session(url) for _ in range(sessions)]
+    for client in clients:
+        await client.connect()
+    await asyncio.gather(*(client.open_quiz("mcq") for client in clients))
+
+    async def answer_all(client, rng):
+        return [await client.answer(rng) for _ in range(answers)]
+
+    return clients, [answer_all(client, random.Random(seed + i)) for i, client in enumerate(clients)]
+
+
+def run_mode(fragments, args, db_path, cache_dir):
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=ROOT, QUIZWHIZ_DB=db_path, QUIZWHIZ_CACHE_DIR=cache_dir,
+               QUIZWHIZ_LLM_BACKEND="stub", QUIZWHIZ_FRAGMENTS="1" if fragments else "0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "app.py"), "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise RuntimeError("streamlit did not start")
+                time.sleep(0.2)
+
+        async def measure():
+            _, workloads = await drive(f"ws://127.0.0.1:{port}/_stcore/stream", args.sessions, args.answers, args.seed)
+            cpu_before = cpu_seconds(server.pid)
+            started = time.perf_counter()
+            latencies = [latency for result in await asyncio.gather(*workloads) for latency in result]
+            return latencies, cpu_seconds(server.pid) - cpu_before, time.perf_counter() - started
+
+        return asyncio.run(measure())
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent browser sessions")
+    parser.add_argument("--answers", type=int, default=25, help="answer changes per session")
+    parser.add_argument("--questions", type=int, default=20, help="questions in the quiz")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "bench.sqlite")
+        make_quiz(db_path, args.questions)
+        print(f"{args.sessions} sessions x {args.answers} answers, {args.questions}-question quiz")
+        print(f"{'mode':<16} {'CPU ms/answer':>14} {'p50 ms':>8} {'p99 ms':>8} {'answers/s':>10}")
+        for fragments in (False, True):
+            latencies, cpu, wall = run_mode(fragments, args, db_path, os.path.join(workdir, "cache"))
+            latencies.sort()
+            print(f"{'fragments' if fragments else 'full reruns':<16} {cpu / len(latencies) * 1000:>14.2f} "
+                  f"{statistics.median(latencies) * 1000:>8.1f} "
+                  f"{latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] * 1000:>8.1f} "
+                  f"{len(latencies) / wall:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,32 @@
 import streamlit as st
-from langchain.schema import HumanMessage
-from PyPDF2 import PdfReader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-import os
-import google.generativeai as genai
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import PromptTemplate
-from dotenv import load_dotenv
-from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-
-# Load environment variables
-load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+from quizwhiz.export import export_pdf
+from quizwhiz.pipeline import stream_questions
+from quizwhiz.pool import get_pool
+from quizwhiz.question_types import get_question_type
+from quizwhiz.streaming import GenerationJob, ParseStats, parse_totals
+from quizwhiz.ui import (
+    current_user,
+    grade_submission,
+    ingest_with_progress,
+    init_resources,
+    page_ranges,
+    persist_quiz,
+    question_fragment,
+    record_attempt,
+    remember_source,
+    saved_quiz_picker,
+    show_attempt_summary,
+    show_diagnostics,
+    show_generation_progress,
+    show_parse_report,
+    submitted_answers,
+    watch_generation,
+)
+
+# Load environment variables and the model client once per process, not on every rerun
+init_resources()
+
+FILL_IN_BLANK = get_question_type("fill_in_blank")
 
 # Initialize session state
 if "questions_json" not in st.session_state:
@@ -22,172 +35,53 @@ if "questions_json" not in st.session_state:
 if "user_answers" not in st.session_state:
     st.session_state.user_answers = {}
 
-# Extract text from PDF files
-# def get_pdf_text(pdf_docs):
-#     """Extract text from uploaded PDF files."""
-#     text = ""
-#     for pdf in pdf_docs:
-#         pdf_reader = PdfReader(pdf)
-#         for page in pdf_reader.pages:
-#             text += page.extract_text() or ""
-#     return text.strip()
-
-def get_pdf_text(pdf_docs, start_page, end_page):
-    """Extract text from selected page range of uploaded PDF files."""
-    text = ""
-    for pdf in pdf_docs:
-        pdf_reader = PdfReader(pdf)
-        num_pages = len(pdf_reader.pages)
-
-        # Ensure the page range is within bounds
-        start_page = max(1, min(start_page, num_pages))
-        end_page = max(1, min(end_page, num_pages))
-
-        for i in range(start_page - 1, end_page):  # Convert 1-based index to 0-based
-            text += pdf_reader.pages[i].extract_text() or ""
-    return text.strip()
-
-# Split text into chunks
-def get_text_chunks(text):
-    """Split text into manageable chunks."""
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=4000, chunk_overlap=500)
-    return text_splitter.split_text(text)
-
-# Generate high-quality fill-in-the-blank questions
-def generate_fill_in_blank_questions(text_chunks, num_questions):
-    """Generate structured, high-standard fill-in-the-blank questions strictly from the text."""
-    model = ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0.7)  # Reduce randomness for precision
-
-    prompt_template = f"""
-    Generate exactly {num_questions} high-quality fill-in-the-blank questions based **only** on the provided text.
-
-    **Strict Instructions:**
-    - question generated should be such that each question should strictly have a blank
-    - Use direct references from the text.
-    - Maintain high academic quality.
-    - Format the output as follows:
-    
-    **Example Output:**
-    Q1. The concept of _____ was introduced by [author/scientist] in [year]. | [correct answer]  
-    Q2. In physics, Newton's Second Law states that Force = Mass × _____. | [Acceleration]  
-    Q3. The capital of France is _____. | [Paris]  
-    
-    **Do NOT generate unrelated questions. Only use the given text.**
-    
-    **Text for Reference:**  
-    {{context}}
-
-    **Generate the Questions Below (Follow the Format Strictly):**
-    """
-
-    prompt = PromptTemplate(template=prompt_template, input_variables=["context"])
-    
-    # Use more text chunks to improve question quality
-    context = " ".join(text_chunks[:5])  
-    formatted_prompt = prompt.format(context=context)
-
-    input_message = HumanMessage(content=formatted_prompt)
-    response = model.invoke([input_message])
-
-    return response.content if hasattr(response, "content") else response
-
-# Parse structured questions into JSON format
-def parse_questions(questions_text):
-    """Parse structured fill-in-the-blank questions into a list."""
-    questions_list = []
-
-    for line in questions_text.strip().split("\n"):
-        parts = line.split("|")
-        if len(parts) == 2:
-            question = parts[0].strip()
-            answer = parts[1].strip()
-            questions_list.append({"question": question, "answer": answer})
-        else:
-            st.warning(f"Skipping invalid question format: {line}")
-
-    return questions_list
-
-# Generate PDF with questions & answers
-def generate_pdf(questions_list):
-    """Create a PDF quiz with questions and answer key."""
-    buffer = BytesIO()
-    pdf_canvas = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-    y_position = height - 50  
-
-    # Quiz Header
-    pdf_canvas.setFont("Helvetica-Bold", 14)
-    pdf_canvas.drawString(50, y_position, "Fill-in-the-Blank Quiz")
-    pdf_canvas.setFont("Helvetica", 10)
-    y_position -= 30
-
-    # Write Questions
-    for i, question in enumerate(questions_list):
-        if y_position < 50:
-            pdf_canvas.showPage()
-            y_position = height - 50
-
-        pdf_canvas.drawString(50, y_position, f"Q{i + 1}: {question['question']}")
-        y_position -= 30
-
-    # Answer Key
-    pdf_canvas.showPage()
-    y_position = height - 50
-    pdf_canvas.setFont("Helvetica-Bold", 14)
-    pdf_canvas.drawString(50, y_position, "Answer Key")
-    pdf_canvas.setFont("Helvetica", 10)
-    y_position -= 30
-
-    for i, question in enumerate(questions_list):
-        pdf_canvas.drawString(50, y_position, f"Q{i + 1}: {question['answer']}")
-        y_position -= 20
-
-    pdf_canvas.save()
-    buffer.seek(0)
-    return buffer
+@question_fragment
+def ask_question(i, q):
+    """Display one question; committing an answer redraws only this question."""
+    st.subheader(f"Question {i+1}")
+    st.write(q["question"])
+    st.text_input("Your answer:", key=f"q{i}")
 
 # Conduct the quiz
-def conduct_fill_in_blank_quiz():
+def conduct_fill_in_blank_quiz(user):
     """Display the quiz and collect user responses."""
-    user_answers = {}
-    for i, q in enumerate(st.session_state.questions_json):
-        st.subheader(f"Question {i+1}")
-        st.write(q["question"])
-        user_answers[i] = st.text_input("Your answer:", key=f"q{i}")
+    questions = list(st.session_state.questions_json)
+    for i, q in enumerate(questions):
+        ask_question(i, q)
 
     if st.button("Submit Quiz"):
+        user_answers = submitted_answers(len(questions))
+        score, _ = grade_submission(FILL_IN_BLANK, questions, user_answers)
+        record_attempt(user, user_answers, score, len(questions))
         st.session_state.user_answers = user_answers
         st.session_state.quiz_submitted = True
         st.rerun()
 
 # Calculate and display quiz score
-def calculate_fill_in_blank_score():
+def calculate_fill_in_blank_score(user):
     """Calculate the score based on user answers."""
     if not st.session_state.user_answers:
         st.warning("No answers submitted yet.")
         return
 
-    score = 0
     total = len(st.session_state.questions_json)
-
-    for i, q in enumerate(st.session_state.questions_json):
-        correct_answer = q["answer"].strip().lower()
-        user_answer = st.session_state.user_answers.get(i, "").strip().lower()
-
-        if user_answer == correct_answer:
-            score += 1
+    score, correct_answers = grade_submission(
+        FILL_IN_BLANK, list(st.session_state.questions_json), st.session_state.user_answers
+    )
 
     st.success(f"You scored {score}/{total}!")
+    show_attempt_summary(user)
 
     st.write("### Correct Answers:")
-    for i, q in enumerate(st.session_state.questions_json):
-        st.write(f"- **{q['question']}**: {q['answer']}")
+    for question, answer in correct_answers:
+        st.write(f"- **{question}**: {answer}")
 
 # Main Streamlit App
 def main():
     st.title("📘 AI Fill-in-the-Blank Quiz Generator")
     st.sidebar.title("📌 Menu")
     option = st.sidebar.radio("Choose an option", ["Generate Questions", "Take Quiz"])
+    user = current_user()
 
     # Generate Questions
     if option == "Generate Questions":
@@ -197,41 +91,99 @@ def main():
         
         start_page = st.sidebar.number_input("Start Page:", min_value=1, value=1)
         end_page = st.sidebar.number_input("End Page:", min_value=1, value=10)
+        reuse_document = st.sidebar.checkbox(
+            "Reuse questions for identical documents",
+            help="Serve a cached question set when the same pages were already processed."
+        )
+        structured = st.sidebar.checkbox(
+            "Structured JSON output",
+            value=True,
+            help="Ask the model for schema-validated JSON; invalid items are repaired or re-requested."
+        )
+        retrieve = st.sidebar.checkbox(
+            "Focus on the most informative sections",
+            value=True,
+            help="Rank the selected pages by content and skip repetitive or low-value sections "
+                 "such as contents pages and indexes."
+        )
+        use_pool = st.sidebar.checkbox(
+            "Serve instantly from the question pool",
+            value=True,
+            help="Draw the quiz from questions generated earlier for these pages; "
+                 "once it is drawn from, the pool refills in the background."
+        )
+
+        sources = page_ranges(pdf_docs or [], start_page, end_page)
 
         if st.sidebar.button("Submit & Process"):
             if pdf_docs:
                 with st.spinner("Processing..."):
-                    # raw_text = get_pdf_text(pdf_docs)
-                    raw_text = get_pdf_text(pdf_docs, start_page, end_page)
-                    text_chunks = get_text_chunks(raw_text)
-                    questions_text = generate_fill_in_blank_questions(text_chunks, num_questions)
-                    print(questions_text)
-                    if questions_text:
-                        st.session_state.questions_json = parse_questions(questions_text)
-                        st.success("✅ Questions Generated Successfully!")
-
-                        # Provide downloadable PDF
-                        pdf_buffer = generate_pdf(st.session_state.questions_json)
+                    # Files are extracted concurrently; chunks follow page and section boundaries
+                    text_chunks = ingest_with_progress(sources)
+                    remember_source("fill_in_blank", sources,
+                                    {"structured": structured, "num_questions": num_questions})
+
+                # Questions stream in on a background job; the quiz can be started right away
+                rejected = []
+                stats = ParseStats(parse_totals)
+
+                def generate():
+                    return stream_questions(
+                        text_chunks, "fill_in_blank", num_questions, reuse_document=reuse_document, rejected=rejected,
+                        structured=structured, stats=stats, retrieve=retrieve
+                    )
+
+                if use_pool:
+                    questions = get_pool().serve("fill_in_blank", text_chunks, num_questions, generate,
+                                                 structured, retrieve)
+                else:
+                    questions = generate()
+                job = GenerationJob(questions)
+                st.session_state.generation_job = job
+                st.session_state.questions_json = job.questions
+                st.info("Questions appear below as they are generated. You can switch to Take Quiz at any time.")
+                show_generation_progress(job, num_questions, label="")
+                persist_quiz()
+
+                show_parse_report(stats, rejected)
+                if job.error:
+                    st.error(f"⚠️ Question generation failed: {job.error}")
+                if job.questions:
+                    st.success("✅ Questions Generated Successfully!")
+
+                    # Provide downloadable PDF (cached on disk by quiz content)
+                    with open(export_pdf(job.questions, FILL_IN_BLANK), "rb") as pdf_file:
                         st.download_button(
                             label="📥 Download Quiz as PDF",
-                            data=pdf_buffer,
+                            data=pdf_file,
                             file_name="fill_in_the_blank_quiz.pdf",
                             mime="application/pdf"
                         )
-                    else:
-                        st.error("⚠️ No valid questions generated. Please try again.")
+                else:
+                    st.error("⚠️ No valid questions generated. Please try again.")
             else:
                 st.error("⚠️ Please upload at least one PDF file.")
 
     # Take Quiz
     if option == "Take Quiz":
+        saved_quiz_picker("fill_in_blank")
+        job = st.session_state.get("generation_job")
+        if job is not None and not job.done:
+            watch_generation(
+                job, len(st.session_state.questions_json),
+                "⏳ {shown} questions ready, more are still being generated..."
+            )
+        else:
+            persist_quiz()  # Generation may have finished while the quiz was being taken
         if st.session_state.questions_json:
             st.write("### 📝 Quiz")
-            conduct_fill_in_blank_quiz()
+            conduct_fill_in_blank_quiz(user)
             if "quiz_submitted" in st.session_state and st.session_state.quiz_submitted:
-                calculate_fill_in_blank_score()
-        else:
-            st.warning("⚠️ No questions available. Please generate them first.")
+                calculate_fill_in_blank_score(user)
+        elif job is None or job.done:
+            st.warning("⚠️ No questions available. Please generate them first or load a saved quiz.")
+
+    show_diagnostics()
 
 if __name__ == "__main__":
     main()
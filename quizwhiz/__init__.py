@@ -0,0 +1,6 @@
+"""Shared building blocks for the QuizWhiz AI pages.
+
+Heavy dependencies (LangChain, the Gemini SDK, PyPDF2, reportlab) are imported inside the
+functions that need them, so importing any quizwhiz module stays cheap and a Streamlit
+page only pays for a library the first time it is actually used.
+"""
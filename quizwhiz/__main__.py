@@ -0,0 +1,5 @@
+import sys
+
+from quizwhiz.cli import main
+
+sys.exit(main())
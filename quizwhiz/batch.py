@@ -0,0 +1,178 @@
+"""Headless bulk quiz generation over a folder or manifest of PDFs.
+
+Every (PDF, page range, question type) is one job. Jobs run concurrently, each going
+through ingestion (extraction and chunking) -> generation -> export, and split the cores
+and the memory ceiling for extraction between them. Finished jobs are appended to
+checkpoint.jsonl in the output directory, so an interrupted run resumes where it stopped.
+"""
+import csv
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from quizwhiz.export import write_pdf
+from quizwhiz.extraction import path_hash
+from quizwhiz.ingestion import Source, ingest_documents
+from quizwhiz.metrics import metrics
+from quizwhiz.pipeline import generate_questions
+from quizwhiz.question_types import get_question_type
+from quizwhiz.store import get_store
+from quizwhiz.streaming import ParseStats, parse_totals
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+
+BatchJob = namedtuple("BatchJob", "path start_page end_page kind num_questions")
+
+
+def load_jobs(source, kinds, num_questions, start_page=1, end_page=None):
+    """Build the job list from a directory of PDFs or a CSV/JSON manifest.
+
+    Manifest rows have a path (relative to the manifest) and may override start_page,
+    end_page, num_questions and types (space separated in CSV, a list in JSON).
+    """
+    if os.path.isdir(source):
+        rows = [{"path": os.path.join(source, name)} for name in sorted(os.listdir(source))
+                if name.lower().endswith(".pdf")]
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, newline="") as manifest:
+            rows = json.load(manifest) if source.endswith(".json") else list(csv.DictReader(manifest))
+        for row in rows:
+            row["path"] = os.path.join(base, row["path"])
+
+    jobs = []
+    for row in rows:
+        row_kinds = row.get("types") or kinds
+        if isinstance(row_kinds, str):
+            row_kinds = row_kinds.split()
+        for kind in row_kinds:
+            get_question_type(kind)  # Fail early on a typo in the manifest
+            jobs.append(BatchJob(
+                row["path"],
+                int(row.get("start_page") or start_page),
+                int(row["end_page"]) if row.get("end_page") else end_page,
+                kind,
+                int(row.get("num_questions") or num_questions),
+            ))
+    return jobs
+
+
+class StageTimer:
+    """Thread-safe per-stage busy time and item counts for the throughput report."""
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, items):
+        with self._lock:
+            total_seconds, total_items = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total_seconds + seconds, total_items + items)
+
+    def report(self, wall_time):
+        lines = [f"{'stage':<12} {'items':>8} {'busy s':>9} {'items/s':>9}"]
+        for stage, (seconds, items) in self.stages.items():
+            rate = items / seconds if seconds else 0.0
+            lines.append(f"{stage:<12} {items:>8} {seconds:>9.2f} {rate:>9.1f}")
+        lines.append(f"wall time: {wall_time:.2f}s")
+        return "\n".join(lines)
+
+
+class Checkpoint:
+    """Append-only record of finished job ids in the output directory."""
+
+    def __init__(self, out_dir):
+        self.path = os.path.join(out_dir, CHECKPOINT_FILE)
+        self.done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(self.path):
+            with open(self.path) as checkpoint:
+                self.done = {json.loads(line)["job"] for line in checkpoint if line.strip()}
+
+    def mark(self, job_id, **details):
+        with self._lock:
+            with open(self.path, "a") as checkpoint:
+                checkpoint.write(json.dumps(dict(details, job=job_id)) + "\n")
+            self.done.add(job_id)
+
+
+def job_id(job, doc_hash):
+    # The requested range, so a finished job is recognized without opening the PDF
+    return f"{doc_hash[:16]}-p{job.start_page}-{job.end_page or 'end'}-{job.kind}-{job.num_questions}"
+
+
+def run_job(job, out_dir, checkpoint, timer, structured=True, reuse_document=True, retrieve=False,
+            shares=1):
+    """Run one job through every stage; return the output file stem, or None if already done.
+
+    shares is the number of jobs running at once, which split the cores and the memory
+    ceiling for extraction.
+    """
+    doc_hash = path_hash(job.path)
+    identifier = job_id(job, doc_hash)
+    if identifier in checkpoint.done:
+        return None
+
+    started = time.perf_counter()
+    document, = ingest_documents([Source(job.path, job.start_page, job.end_page)], shares=shares)
+    timer.record("ingest", time.perf_counter() - started, document.end_page - document.start_page + 1)
+
+    started = time.perf_counter()
+    stats = ParseStats(parse_totals)
+    questions = generate_questions(document.chunks, job.kind, job.num_questions, structured=structured,
+                                   reuse_document=reuse_document, stats=stats, retrieve=retrieve)
+    timer.record("generate", time.perf_counter() - started, len(questions))
+
+    started = time.perf_counter()
+    # The job id keeps rows that differ only in count or directory from overwriting each other
+    stem = f"{os.path.splitext(os.path.basename(job.path))[0]}_{identifier}"
+    with open(os.path.join(out_dir, stem + ".json"), "w") as output:
+        json.dump({"source": job.path, "start_page": document.start_page, "end_page": document.end_page,
+                   "type": job.kind, "questions": questions}, output, indent=2)
+    with open(os.path.join(out_dir, stem + ".pdf"), "wb") as output, metrics.timer("export"):
+        write_pdf(questions, get_question_type(job.kind), output)
+        metrics.inc("quizwhiz_export_bytes_total", output.tell())
+    timer.record("export", time.perf_counter() - started, 1)
+
+    # Saved quizzes can be reloaded from the app's Take Quiz sidebar
+    store = get_store()
+    store.save_document(document.doc_hash, os.path.basename(job.path), document.num_pages)
+    store.save_quiz(job.kind, questions, document.doc_hash, document.start_page, document.end_page,
+                    {"structured": structured, "num_questions": job.num_questions})
+
+    checkpoint.mark(identifier, output=stem, questions=len(questions), success_rate=stats.success_rate)
+    return stem
+
+
+def run_batch(jobs, out_dir, concurrency=4, structured=True, reuse_document=True, retrieve=False, log=print):
+    """Run jobs with at most concurrency in flight and return the StageTimer."""
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = Checkpoint(out_dir)
+    timer = StageTimer()
+    started = time.perf_counter()
+    failures = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(run_job, job, out_dir, checkpoint, timer, structured, reuse_document, retrieve,
+                        min(concurrency, len(jobs))): job
+            for job in jobs
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            try:
+                stem = future.result()
+            except Exception as exc:
+                failures += 1
+                log(f"[{done}/{len(jobs)}] FAILED {job.path} ({job.kind}): {exc}")
+            else:
+                status = "skipped (checkpoint)" if stem is None else f"wrote {stem}"
+                log(f"[{done}/{len(jobs)}] {status}")
+
+    log(timer.report(time.perf_counter() - started))
+    if failures:
+        log(f"{failures} job(s) failed; rerun the same command to retry them")
+    return timer
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import threading
+import time
+
+# Directory holding every on-disk cache (override with QUIZWHIZ_CACHE_DIR)
+CACHE_DIR = os.getenv("QUIZWHIZ_CACHE_DIR", ".quizwhiz_cache")
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class DiskCache:
+    """SQLite-backed key/value store with LRU size-bounded eviction."""
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, ttl=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        self._conn.commit()
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def get_many(self, keys):
+        """Return a dict with the cached values for whichever keys are present."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        now = time.time()
+        found = {}
+        expired = []
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, value, created in rows:
+                    if self._expired(created, now):
+                        expired.append(key)
+                    else:
+                        found[key] = value
+            if expired:
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in expired])
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET last_access = ? WHERE key = ?", [(now, k) for k in found]
+                )
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def set_many(self, items):
+        """Store several key/value pairs and evict least recently used entries if over budget."""
+        now = time.time()
+        rows = [(key, value, len(value), now, now) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict()
+            self._conn.commit()
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def _evict(self):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters together with the current entry count and size."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+def get_cache(name, **kwargs):
+    """Return the process-wide cache stored as CACHE_DIR/<name>.sqlite."""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = DiskCache(os.path.join(CACHE_DIR, f"{name}.sqlite"), **kwargs)
+        return _caches[name]
@@ -0,0 +1,229 @@
+"""Token-budgeted chunking that follows the structure of the document.
+
+Page text is cut into blocks at headings, blank lines and sentence-ending line breaks.
+Blocks are packed into chunks of at most CHUNK_TOKENS tokens. When a chunk is full it is
+closed at the strongest boundary that still leaves it well filled: before a heading, then
+at a page break, a paragraph and a sentence. Only blocks too long for a chunk of their
+own are cut mid-sentence, and only those cuts repeat CHUNK_OVERLAP_TOKENS of text.
+
+Every chunk is a contiguous slice of its document, so the chunking of a document is
+cached as offsets and page numbers under the document and page-text hashes.
+"""
+import bisect
+import hashlib
+import json
+import re
+from collections import namedtuple
+
+from quizwhiz.cache import get_cache
+from quizwhiz.metrics import metrics
+from quizwhiz.response_cache import cache_key
+
+CHUNK_TOKENS = 1000
+CHUNK_OVERLAP_TOKENS = 100
+
+# A chunk is only closed early, at a better boundary, once it holds this share of the budget
+MIN_FILL = 0.6
+
+# Bump when the chunking rules change so cached boundaries are recomputed
+CHUNKER_VERSION = 1
+
+PAGE_SEPARATOR = "\n\n"
+
+# Strength of the boundary in front of a block; cuts below SENTENCE get overlap
+HEADING, PAGE, PARAGRAPH, SENTENCE, LINE, SPLIT = 5, 4, 3, 2, 1, 0
+
+Chunk = namedtuple("Chunk", "text doc first_page last_page tokens")
+_Block = namedtuple("_Block", "start end strength tokens")
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_WORD = re.compile(r"\S+\s*")
+_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?\s+\S|(?:chapter|section|part|unit|appendix)\b)", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"[.!?:;][\"')\]]*$")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def get_chunk_cache():
+    return get_cache("chunks")
+
+
+def count_tokens(text):
+    """Estimate model tokens: one per punctuation mark and per started six letters of a word.
+
+    Gemini's tokenizer is only reachable through an API call; this tracks subword
+    tokenizers, which split long and rare words into several pieces.
+    """
+    return sum(1 + (len(token) - 1) // 6 for token in _TOKEN.findall(text))
+
+
+def is_heading(line):
+    """Numbered ("2.1 Cell structure"), labelled ("Chapter 3") or all-caps short lines."""
+    line = line.strip()
+    if not line or len(line) > 80 or _SENTENCE_END.search(line):
+        return False
+    return bool(_HEADING.match(line)) or (line.isupper() and any(char.isalpha() for char in line))
+
+
+def _page_blocks(text, offset, strength):
+    """Yield (start, end, strength) for the blocks of one page, as offsets into the document."""
+    start = None
+    position = 0
+    for line in text.splitlines(keepends=True):
+        line_start, position = position, position + len(line)
+        content = line.strip()
+        if not content:
+            if start is not None:
+                yield offset + start, offset + line_start, strength
+                start = None
+            strength = max(strength, PARAGRAPH)
+        elif is_heading(content):
+            if start is not None:
+                yield offset + start, offset + line_start, strength
+                start = None
+            yield offset + line_start, offset + position, HEADING
+            strength = LINE  # Keep a heading with the text it introduces
+        else:
+            if start is None:
+                start = line_start
+            if _SENTENCE_END.search(content):
+                yield offset + start, offset + position, strength
+                start, strength = None, SENTENCE
+    if start is not None:
+        yield offset + start, offset + len(text), strength
+
+
+def _split(document, start, end, max_tokens):
+    """Cut an oversized block at sentence ends, falling back to word boundaries."""
+    cuts = [start] + [match.end() for match in _SENTENCE_SPLIT.finditer(document, start, end)] + [end]
+    for piece_start, piece_end in zip(cuts, cuts[1:]):
+        if piece_start == piece_end:
+            continue
+        if count_tokens(document[piece_start:piece_end]) <= max_tokens:
+            yield piece_start, piece_end
+            continue
+        tokens = 0
+        for word in _WORD.finditer(document, piece_start, piece_end):
+            word_tokens = count_tokens(word.group())
+            if tokens and tokens + word_tokens > max_tokens:
+                yield piece_start, word.start()
+                piece_start, tokens = word.start(), 0
+            tokens += word_tokens
+        yield piece_start, piece_end
+
+
+def _blocks(document, page_starts, max_tokens, overlap_tokens):
+    # Pieces of a split block leave room for the overlap that is carried in front of them
+    piece_tokens = max(1, max_tokens - overlap_tokens)
+    page_ends = page_starts[1:] + [len(document)]
+    for number, (page_start, page_end) in enumerate(zip(page_starts, page_ends)):
+        page_text = document[page_start:page_end]
+        for start, end, strength in _page_blocks(page_text, page_start, PAGE if number else HEADING):
+            tokens = count_tokens(document[start:end])
+            if tokens <= max_tokens:
+                yield _Block(start, end, strength, tokens)
+                continue
+            for i, (piece_start, piece_end) in enumerate(_split(document, start, end, piece_tokens)):
+                yield _Block(piece_start, piece_end, strength if i == 0 else SPLIT,
+                             count_tokens(document[piece_start:piece_end]))
+
+
+def _overlap_start(document, start, end, overlap_tokens):
+    """Offset in start..end where the last overlap_tokens tokens of that span begin."""
+    words = list(_WORD.finditer(document, start, end))
+    tokens = 0
+    for word in reversed(words):
+        tokens += count_tokens(word.group())
+        if tokens > overlap_tokens:
+            return word.end()
+    return start
+
+
+def _best_cut(blocks, max_tokens):
+    """Number of leading blocks to close the chunk with."""
+    fill = 0
+    best, best_strength = 1, -1
+    for k in range(1, len(blocks)):
+        fill += blocks[k - 1].tokens
+        if fill > max_tokens:
+            break
+        strength = blocks[k].strength
+        if fill >= MIN_FILL * max_tokens and strength >= best_strength:
+            best, best_strength = k, strength
+        elif best_strength < 0:
+            best = k  # Fallback: the fullest chunk that fits
+    return best
+
+
+def chunk_bounds(document, page_starts, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """Return [(start, end, tokens), ...] chunk spans of document, whose pages begin at page_starts."""
+    spans = []
+    current = []
+    lead = None  # (offset, tokens) of overlap carried in front of current
+    total = 0
+
+    def close(count):
+        nonlocal current, lead, total
+        closed, current = current[:count], current[count:]
+        start = lead[0] if lead else closed[0].start
+        spans.append((start, closed[-1].end, sum(block.tokens for block in closed) + (lead[1] if lead else 0)))
+        lead = None
+        if current and current[0].strength < SENTENCE and overlap_tokens:
+            offset = _overlap_start(document, closed[0].start, closed[-1].end, overlap_tokens)
+            lead = (offset, count_tokens(document[offset:closed[-1].end]))
+        total = sum(block.tokens for block in current) + (lead[1] if lead else 0)
+
+    for block in _blocks(document, page_starts, max_tokens, overlap_tokens):
+        current.append(block)
+        total += block.tokens
+        while total > max_tokens and len(current) > 1:
+            close(_best_cut(current, max_tokens - (lead[1] if lead else 0)))
+    if current:
+        close(len(current))
+
+    # Trim surrounding whitespace so chunks start and end on text
+    trimmed = []
+    for start, end, tokens in spans:
+        text = document[start:end]
+        start += len(text) - len(text.lstrip())
+        end -= len(text) - len(text.rstrip())
+        if end > start:
+            trimmed.append((start, end, tokens))
+    return trimmed
+
+
+@metrics.timed("chunk")
+def chunk_document(doc_hash, pages, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """Chunk one document given as [(page_number, text), ...] and return a list of Chunk.
+
+    With a doc_hash the boundaries are cached, so a document that was already seen is
+    sliced without being tokenized again. The key includes a hash of the page text, since
+    the same file can yield different text (with or without OCR, or a new OCR version).
+    """
+    document = PAGE_SEPARATOR.join(text for _, text in pages)
+    page_starts = []
+    offset = 0
+    for _, text in pages:
+        page_starts.append(offset)
+        offset += len(text) + len(PAGE_SEPARATOR)
+    numbers = [number for number, _ in pages]
+
+    key = None
+    bounds = None
+    if doc_hash is not None:
+        text_hash = hashlib.sha256(document.encode("utf-8")).hexdigest()
+        key = cache_key("chunks", CHUNKER_VERSION, doc_hash, text_hash, numbers, max_tokens,
+                        overlap_tokens)
+        cached = get_chunk_cache().get(key)
+        if cached is not None:
+            bounds = json.loads(cached)
+    if bounds is None:
+        bounds = chunk_bounds(document, page_starts, max_tokens, overlap_tokens)
+        if key is not None:
+            get_chunk_cache().set(key, json.dumps(bounds).encode("utf-8"))
+
+    return [
+        Chunk(document[start:end], doc_hash,
+              numbers[bisect.bisect_right(page_starts, start) - 1],
+              numbers[bisect.bisect_right(page_starts, end - 1) - 1], tokens)
+        for start, end, tokens in bounds
+    ]
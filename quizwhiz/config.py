@@ -0,0 +1,29 @@
+import multiprocessing
+import os
+import threading
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure():
+    """Load environment variables and configure the Gemini SDK, once per process."""
+    global _configured
+    with _configure_lock:
+        if not _configured:
+            import google.generativeai as genai
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+            _configured = True
+
+
+def worker_context():
+    """Multiprocessing context for worker pools.
+
+    Forking the multithreaded Streamlit server can copy locks held by its other threads,
+    so workers start from a forkserver, or are spawned where there is none.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
@@ -0,0 +1,112 @@
+"""Near-duplicate question detection with MinHash and locality-sensitive hashing.
+
+Question text is normalized and cut into character shingles. A MinHash signature
+estimates the Jaccard similarity of two shingle sets, and banding the signatures
+(LSH) finds the few earlier questions worth comparing against without scanning them
+all, so checking a question costs the same however many have been accepted.
+"""
+import re
+import zlib
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16  # 16 bands of 4 rows: pairs above ~0.5 similarity almost always share a bucket
+
+# Estimated Jaccard similarity at which two questions count as the same question
+DUPLICATE_THRESHOLD = 0.6
+
+
+def question_key(question):
+    """Normalize question text so trivially different copies compare equal."""
+    return re.sub(r"[^a-z0-9]+", " ", question["question"].lower()).strip()
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures using multiply-shift hashing of 32-bit shingle hashes."""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.multipliers = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self.increments = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        import numpy as np
+
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64)
+        # Products wrap around modulo 2**64; the high bits are the permuted hash
+        permuted = (self.multipliers[:, None] * hashes[None, :] + self.increments[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1)
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float((first == second).mean())
+
+
+class NearDuplicateIndex:
+    """LSH index over accepted questions' signatures."""
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.rows = num_perm // bands
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = []
+
+    def signature(self, question):
+        return self.hasher.signature(question_key(question))
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(len(self.buckets))]
+
+    def neighbours(self, signature):
+        """Indices of accepted questions sharing at least one LSH bucket with signature."""
+        found = set()
+        for buckets, key in zip(self.buckets, self._band_keys(signature)):
+            found.update(buckets.get(key, ()))
+        return found
+
+    def closest(self, signature):
+        """Highest estimated similarity to any accepted question (0.0 when none is close)."""
+        return max((similarity(signature, self.signatures[i]) for i in self.neighbours(signature)), default=0.0)
+
+    def is_duplicate(self, signature):
+        return self.closest(signature) >= self.threshold
+
+    def add(self, signature):
+        index = len(self.signatures)
+        self.signatures.append(signature)
+        for buckets, key in zip(self.buckets, self._band_keys(signature)):
+            buckets.setdefault(key, []).append(index)
+
+
+def select_diverse(candidates, count, index, coverage):
+    """Pick up to count (question, signature) candidates that are not near-duplicates.
+
+    Each pick favours the source chunk with the fewest questions so far (coverage maps
+    chunk to count and is updated), then the candidate least similar to what is already
+    in the index. Picked candidates are removed from the list and added to the index.
+    """
+    chosen = []
+    while candidates and len(chosen) < count:
+        scored = []
+        for position, (question, signature) in enumerate(candidates):
+            closest = index.closest(signature)
+            if closest < index.threshold:
+                scored.append((coverage.get(question.get("chunk"), 0), closest, position))
+        if not scored:
+            break
+        _, _, position = min(scored)
+        question, signature = candidates.pop(position)
+        index.add(signature)
+        coverage[question.get("chunk")] = coverage.get(question.get("chunk"), 0) + 1
+        chosen.append(question)
+    return chosen
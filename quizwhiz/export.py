@@ -0,0 +1,223 @@
+"""Quiz PDF export.
+
+Pages are laid out with word wrapping and written to the output one at a time by a small
+streaming PDF writer, so memory stays flat no matter how many questions are exported.
+Rendered files are cached on disk by the hash of the quiz content.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from io import BytesIO
+
+from quizwhiz.cache import CACHE_DIR
+from quizwhiz.metrics import metrics
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US letter, in points
+MARGIN = 50
+BODY_SIZE, BODY_LEADING = 10, 15
+TITLE_SIZE, TITLE_GAP = 14, 30
+
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+EXPORT_CACHE_BYTES = 1024 * 1024 * 1024
+
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+
+
+def _pdf_string(text):
+    encoded = text.encode("cp1252", errors="replace")
+    return b"(" + encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class StreamingPdfWriter:
+    """Writes a text-only PDF page by page; only object offsets are kept in memory."""
+
+    # Object numbers 1-2 are the catalog and page tree, then one per font
+    CATALOG, PAGES = 1, 2
+
+    def __init__(self, out):
+        self.out = out
+        self.position = 0
+        self.offsets = {}
+        self.page_ids = []
+        self.font_ids = {name: self.PAGES + i for i, name in enumerate(FONTS, 1)}
+        self.next_id = self.PAGES + len(FONTS) + 1
+
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(self.CATALOG, b"<< /Type /Catalog /Pages 2 0 R >>")
+        for name, base_font in FONTS.items():
+            self._object(self.font_ids[name], (
+                f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>"
+            ).encode())
+        fonts = " ".join(f"/{name} {number} 0 R" for name, number in self.font_ids.items())
+        self._resources = f"/Resources << /Font << {fonts} >> >>".encode()
+
+    def _write(self, data):
+        self.out.write(data)
+        self.position += len(data)
+
+    def _object(self, number, body):
+        self.offsets[number] = self.position
+        self._write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def add_page(self, content):
+        """Compress and write one page's content stream, then release it."""
+        stream = zlib.compress(content)
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, (
+            f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode() + stream + b"\nendstream"
+        ))
+        self._object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] ".encode()
+            + self._resources + f" /Contents {content_id} 0 R >>".encode()
+        ))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{number} 0 R" for number in self.page_ids)
+        self._object(self.PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode())
+        xref = self.position
+        lines = [f"xref\n0 {self.next_id}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets.get(number, 0):010d} 00000 n \n" for number in range(1, self.next_id)]
+        lines.append(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n")
+        self._write("".join(lines).encode())
+
+
+class PageLayout:
+    """Flows wrapped lines of text down the page and onto new pages as needed."""
+
+    def __init__(self, writer):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        self.writer = writer
+        self.string_width = stringWidth
+        self.ops = []
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def new_page(self):
+        self.writer.add_page(b"\n".join(self.ops))
+        self.ops = []
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def ensure(self, height):
+        if self.y - height < MARGIN:
+            self.new_page()
+
+    def wrap(self, text, font, size, width):
+        """Greedy word wrap; words wider than a whole line are split by character."""
+        base_font = FONTS[font]
+        space = self.string_width(" ", base_font, size)
+        lines = []
+        line = []
+        line_width = 0.0
+        for word in text.split():
+            word_width = self.string_width(word, base_font, size)
+            if line and line_width + space + word_width <= width:
+                line.append(word)
+                line_width += space + word_width
+                continue
+            if line:
+                lines.append(" ".join(line))
+            while word_width > width:
+                cut = len(word) - 1
+                while cut > 1 and self.string_width(word[:cut], base_font, size) > width:
+                    cut -= 1
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_width = self.string_width(word, base_font, size)
+            line = [word]
+            line_width = word_width
+        lines.append(" ".join(line))
+        return lines
+
+    def text(self, text, indent=0, font="F1", size=BODY_SIZE, leading=BODY_LEADING):
+        x = MARGIN + indent
+        for line in self.wrap(text, font, size, PAGE_WIDTH - MARGIN - x):
+            self.ensure(leading)
+            self.ops.append(
+                f"BT /{font} {size} Tf 1 0 0 1 {x} {self.y:.2f} Tm ".encode() + _pdf_string(line) + b" Tj ET"
+            )
+            self.y -= leading
+
+    def heading(self, text):
+        self.ensure(TITLE_GAP + BODY_LEADING)
+        self.text(text, font="F2", size=TITLE_SIZE, leading=TITLE_GAP)
+
+    def space(self, amount):
+        self.y -= amount
+
+    def close(self):
+        self.new_page()
+        self.writer.close()
+
+
+def write_pdf(questions, question_type, out):
+    """Stream the quiz questions and the answer key as a PDF into the binary file object out."""
+    layout = PageLayout(StreamingPdfWriter(out))
+
+    layout.heading(question_type.title)
+    for i, question in enumerate(questions):
+        layout.text(f"Q{i + 1}: {question['question']}")
+        for indent, line in question_type.pdf_lines(question):
+            layout.text(line, indent)
+        layout.space(10)
+
+    # Start the answer key on a fresh page unless there is room for a few lines
+    if layout.y < 100 + MARGIN:
+        layout.new_page()
+    layout.heading("Answer Key")
+    for i, question in enumerate(questions):
+        layout.text(f"Q{i + 1}: {question['answer']}")
+    layout.close()
+
+
+def quiz_hash(questions, question_type):
+    payload = json.dumps({"type": question_type.name, "questions": questions}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _prune_exports(keep):
+    entries = []
+    for name in os.listdir(EXPORT_DIR):
+        if name.endswith(".pdf"):
+            stat = os.stat(os.path.join(EXPORT_DIR, name))
+            entries.append((stat.st_mtime, stat.st_size, os.path.join(EXPORT_DIR, name)))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= EXPORT_CACHE_BYTES:
+            break
+        if path != keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Another process pruned it first
+            total -= size
+
+
+def export_pdf(questions, question_type):
+    """Return the path of the rendered quiz PDF, rendering it only if this exact quiz is new."""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, f"{quiz_hash(questions, question_type)}.pdf")
+    if os.path.exists(path):
+        os.utime(path)  # Mark as recently used for eviction
+        return path
+
+    descriptor, tmp_path = tempfile.mkstemp(dir=EXPORT_DIR, suffix=".tmp")
+    with os.fdopen(descriptor, "wb") as out, metrics.timer("export"):
+        write_pdf(questions, question_type, out)
+        metrics.inc("quizwhiz_export_bytes_total", out.tell())
+    os.replace(tmp_path, path)
+    _prune_exports(keep=path)
+    return path
+
+
+def generate_pdf(questions, question_type):
+    """Generate a PDF containing the quiz questions and the answer key, as an in-memory buffer."""
+    buffer = BytesIO()
+    with metrics.timer("export"):
+        write_pdf(questions, question_type, buffer)
+    metrics.inc("quizwhiz_export_bytes_total", buffer.tell())
+    buffer.seek(0)
+    return buffer
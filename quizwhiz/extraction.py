@@ -0,0 +1,206 @@
+import hashlib
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from multiprocessing.util import Finalize
+
+from quizwhiz.cache import get_cache
+from quizwhiz.config import worker_context
+from quizwhiz.metrics import metrics
+from quizwhiz.ocr import OCR_WORKERS, needs_ocr, ocr_enabled, ocr_page, page_images
+
+# Extracted page text is tiny next to the PDFs it comes from, 512 MB holds whole libraries
+PAGE_CACHE_BYTES = 512 * 1024 * 1024
+
+# Below this many uncached pages, starting a process pool costs more than it saves
+PARALLEL_MIN_PAGES = 24
+
+# Each worker receives several small shards so results can be streamed back in order early
+SHARDS_PER_WORKER = 4
+
+# Scanned pages waiting for OCR per worker before extraction stops reading ahead
+OCR_LOOKAHEAD = 4
+
+_worker_reader = None
+
+
+def get_page_cache():
+    return get_cache("pages", max_bytes=PAGE_CACHE_BYTES)
+
+
+def read_pdf_bytes(pdf):
+    """Return the raw bytes of an uploaded file or any binary file object."""
+    if hasattr(pdf, "getvalue"):
+        return pdf.getvalue()
+    pdf.seek(0)
+    return pdf.read()
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def path_hash(path, block_size=1024 * 1024):
+    """file_hash of the file at path, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as pdf:
+        for block in iter(lambda: pdf.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def documents_hash(pdf_docs):
+    """Identify a set of uploaded PDFs; a single file keeps its own file_hash."""
+    hashes = [file_hash(read_pdf_bytes(pdf)) for pdf in pdf_docs]
+    return hashes[0] if len(hashes) == 1 else file_hash("".join(hashes).encode())
+
+
+def _page_key(doc_hash, index):
+    return f"{doc_hash}:{index}"
+
+
+def _open_reader(data):
+    """Return (PdfReader, file) for a PDF's bytes or path; the caller closes the file."""
+    from PyPDF2 import PdfReader
+
+    # A path is parsed from an open file, which PdfReader reads on demand, not loaded whole
+    file = open(data, "rb") if isinstance(data, str) else BytesIO(data)
+    try:
+        return PdfReader(file), file
+    except Exception:
+        file.close()
+        raise
+
+
+def _init_worker(data):
+    global _worker_reader
+    _worker_reader, file = _open_reader(data)
+    # Closed when the worker exits, as the pool shuts down
+    Finalize(None, file.close, exitpriority=0)
+
+
+def _extract_shard(indices):
+    return [_worker_reader.pages[i].extract_text() or "" for i in indices]
+
+
+def _shards(indices, max_workers):
+    size = max(1, -(-len(indices) // (max_workers * SHARDS_PER_WORKER)))
+    return [indices[i:i + size] for i in range(0, len(indices), size)]
+
+
+class CachedPdf:
+    """A PDF whose page count and page text are served from the page cache when possible.
+
+    data is the file's bytes or its path; a path is what extraction workers receive, so
+    large files are not copied into every worker process. ocr=None OCRs image-only pages
+    whenever Tesseract is available (see quizwhiz.ocr).
+    """
+
+    def __init__(self, data, cache=None, doc_hash=None, ocr=None):
+        self.data = data
+        self.doc_hash = doc_hash or (path_hash(data) if isinstance(data, str) else file_hash(data))
+        self.cache = cache if cache is not None else get_page_cache()
+        self.ocr = ocr_enabled() if ocr is None else ocr
+        self._reader = None
+        self._file = None
+        self._num_pages = None
+
+    @property
+    def reader(self):
+        # Only parse the PDF once something is actually missing from the cache
+        if self._reader is None:
+            self._reader, self._file = _open_reader(self.data)
+        return self._reader
+
+    def close(self):
+        """Close the file the reader reads from; the reader is reopened if needed again."""
+        if self._file is not None:
+            self._file.close()
+            self._reader = self._file = None
+
+    @property
+    def num_pages(self):
+        if self._num_pages is None:
+            key = f"{self.doc_hash}:count"
+            cached = self.cache.get(key)
+            if cached is None:
+                self._num_pages = len(self.reader.pages)
+                self.cache.set(key, str(self._num_pages).encode())
+            else:
+                self._num_pages = int(cached)
+        return self._num_pages
+
+    def iter_page_texts(self, start_page, end_page, max_workers=None):
+        """Yield the text of 1-based pages start_page..end_page in order, as soon as each is ready.
+
+        Cached pages are served directly; missing pages are extracted serially for short
+        ranges and sharded across a process pool otherwise. With OCR on, pages without a
+        text layer are recognized from their images while later pages are extracted.
+        """
+        texts = self._iter_text_layer(start_page, end_page, max_workers)
+        if not self.ocr:
+            yield from texts
+            return
+
+        pending = deque()  # (index, text layer, Future of the OCR text or None), in page order
+        for i, page_text in enumerate(texts, start_page - 1):
+            images = page_images(self.reader.pages[i]) if needs_ocr(page_text) else []
+            pending.append((i, page_text, ocr_page(images) if images else None))
+            while pending and (len(pending) > OCR_WORKERS * OCR_LOOKAHEAD or pending[0][2] is None
+                               or pending[0][2].done()):
+                yield self._resolve(*pending.popleft())
+        while pending:
+            yield self._resolve(*pending.popleft())
+
+    def _resolve(self, index, page_text, recognition):
+        if recognition is None:
+            return page_text
+        try:
+            with metrics.timer("ocr"):
+                recognized = recognition.result()
+        except Exception:
+            metrics.inc("quizwhiz_ocr_errors_total")
+            return page_text  # A page Tesseract cannot read keeps its text layer
+        # Later runs find the recognized text with the rest of the document
+        self.cache.set(_page_key(self.doc_hash, index), recognized.encode("utf-8"))
+        return recognized
+
+    def _iter_text_layer(self, start_page, end_page, max_workers=None):
+        indices = list(range(start_page - 1, end_page))
+        keys = [_page_key(self.doc_hash, i) for i in indices]
+        cached = self.cache.get_many(keys)
+        missing = [i for i, key in zip(indices, keys) if key not in cached]
+
+        max_workers = max_workers or os.cpu_count() or 1
+        if len(missing) < PARALLEL_MIN_PAGES or max_workers < 2:
+            for i, key in zip(indices, keys):
+                if key in cached:
+                    yield cached[key].decode("utf-8")
+                else:
+                    page_text = self.reader.pages[i].extract_text() or ""
+                    self.cache.set(key, page_text.encode("utf-8"))
+                    yield page_text
+            return
+
+        with ProcessPoolExecutor(max_workers, mp_context=worker_context(), initializer=_init_worker,
+                                 initargs=(self.data,)) as pool:
+            shard_of = {}
+            for shard in _shards(missing, max_workers):
+                future = pool.submit(_extract_shard, shard)
+                for position, i in enumerate(shard):
+                    shard_of[i] = (future, shard, position)
+
+            stored = set()
+            for i, key in zip(indices, keys):
+                if key in cached:
+                    yield cached[key].decode("utf-8")
+                    continue
+                future, shard, position = shard_of[i]
+                shard_texts = future.result()
+                if id(future) not in stored:
+                    stored.add(id(future))
+                    self.cache.set_many(
+                        (_page_key(self.doc_hash, j), t.encode("utf-8")) for j, t in zip(shard, shard_texts)
+                    )
+                yield shard_texts[position]
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import random
+import re
+
+_COUNT_PATTERN = re.compile(r"generate (?:exactly )?(\d+)", re.IGNORECASE)
+_CONTEXT_PATTERN = re.compile(r"\*\*(?:Context|Text for Reference):\*\*(.*?)\*\*", re.DOTALL)
+_WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z-]{3,}")
+
+
+class FakeLLM:
+    """Offline stand-in for the Gemini model that answers quiz prompts from their own context.
+
+    Output follows the MCQ ("question:/option:/answer:"), fill-in-the-blank
+    ("... _____ ... | answer") or structured JSON format depending on what the prompt asks
+    for, and is deterministic for a given prompt.
+    """
+
+    def __call__(self, prompt):
+        return self.complete(prompt)
+
+    def complete(self, prompt):
+        count_match = _COUNT_PATTERN.search(prompt)
+        count = int(count_match.group(1)) if count_match else 5
+        context_match = _CONTEXT_PATTERN.search(prompt)
+        context = context_match.group(1) if context_match else prompt
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", context) if _WORD_PATTERN.search(s)]
+        if not sentences:
+            return ""
+        words = sorted({w for s in sentences for w in _WORD_PATTERN.findall(s)})
+
+        if "JSON array" in prompt:
+            return self._json(rng, sentences, words, count, '"options"' in prompt)
+        if "option:" in prompt:
+            return "\n\n".join(self._mcq(rng, sentences, words) for _ in range(count))
+        return "\n".join(f"Q{i + 1}. {self._fill_in_blank(rng, sentences)}" for i in range(count))
+
+    def _pick(self, rng, sentences):
+        sentence = rng.choice(sentences)
+        answer = rng.choice(_WORD_PATTERN.findall(sentence))
+        return sentence.replace(answer, "_____", 1), answer
+
+    def _mcq(self, rng, sentences, words):
+        question, answer = self._pick(rng, sentences)
+        distractors = [w for w in words if w != answer]
+        rng.shuffle(distractors)
+        options = [answer] + distractors[:3]
+        while len(options) < 4:
+            options.append(f"None of the above {len(options)}")
+        rng.shuffle(options)
+        lines = [f"question: Which word completes: {question}"]
+        lines += [f"option: {option}" for option in options]
+        lines.append(f"answer: {answer}")
+        return "\n".join(lines)
+
+    def _json(self, rng, sentences, words, count, mcq):
+        items = []
+        for _ in range(count):
+            question, answer = self._pick(rng, sentences)
+            if mcq:
+                distractors = [w for w in words if w != answer]
+                rng.shuffle(distractors)
+                options = [answer] + distractors[:3]
+                rng.shuffle(options)
+                items.append({"question": f"Which word completes: {question}", "options": options, "answer": answer})
+            else:
+                items.append({"question": question, "answer": answer})
+        return "```json\n" + json.dumps(items, indent=2) + "\n```"
+
+    def _fill_in_blank(self, rng, sentences):
+        question, answer = self._pick(rng, sentences)
+        return f"{question} | [{answer}]"
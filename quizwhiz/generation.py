@@ -0,0 +1,108 @@
+import math
+
+from quizwhiz.dedup import NearDuplicateIndex, select_diverse
+
+# A request asks for this fraction more questions than planned, spread over its prompts,
+# so near-duplicates can be replaced from the spares without another model call
+OVERSAMPLE = 0.2
+
+
+def plan_chunks(text_chunks, num_questions):
+    """Decide how many questions to ask of each chunk, as a list of (chunk_index, count).
+
+    With fewer questions than chunks, evenly spaced chunks get one question each so the
+    whole page range is sampled. Otherwise questions are split in proportion to chunk
+    size using largest-remainder rounding.
+    """
+    chunks = [i for i, chunk in enumerate(text_chunks) if chunk.strip()]
+    if not chunks or num_questions < 1:
+        return []
+
+    if num_questions <= len(chunks):
+        step = len(chunks) / num_questions
+        return [(chunks[int(k * step)], 1) for k in range(num_questions)]
+
+    sizes = [len(text_chunks[i]) for i in chunks]
+    total = sum(sizes)
+    quotas = [num_questions * size / total for size in sizes]
+    counts = [int(quota) for quota in quotas]
+    leftover = num_questions - sum(counts)
+    by_remainder = sorted(range(len(chunks)), key=lambda k: quotas[k] - counts[k], reverse=True)
+    for k in by_remainder[:leftover]:
+        counts[k] += 1
+    return [(chunks[k], count) for k, count in zip(range(len(chunks)), counts) if count]
+
+
+def _with_spares(counts, oversample):
+    """Add ceil(sum(counts) * oversample) spares to counts, by largest remainder of each share."""
+    quotas = [count * oversample for count in counts]
+    spares = [int(quota) for quota in quotas]
+    leftover = math.ceil(sum(quotas)) - sum(spares)
+    by_remainder = sorted(range(len(counts)), key=lambda k: (quotas[k] - spares[k], counts[k]), reverse=True)
+    for k in by_remainder[:leftover]:
+        spares[k] += 1
+    return [count + spare for count, spare in zip(counts, spares)]
+
+
+def stream_generate(text_chunks, num_questions, build_prompt, new_parser, llm, stats=None, rerequest_rounds=1,
+                    oversample=OVERSAMPLE):
+    """Stream questions from every planned chunk concurrently, yielding each as soon as it parses.
+
+    build_prompt(context, count) returns the prompt for one chunk and new_parser() returns an
+    incremental parser (see quizwhiz.streaming). llm.stream_many(prompts) streams the prompts
+    concurrently, bounded by the client's concurrency cap. Every question is tagged with its
+    source "chunk" index and the stream stops at num_questions.
+
+    Near-duplicates of questions already yielded are dropped. Each chunk yields at most its
+    planned count; the oversampled extras are kept as spares, and once the streams finish any
+    shortfall is filled with the spares that best cover the least represented chunks.
+    Chunks whose output contained invalid items are then asked again, for only the missing
+    number of questions, up to rerequest_rounds times.
+    """
+    plan = plan_chunks(text_chunks, num_questions)
+    produced = [0] * len(plan)
+    index = NearDuplicateIndex()
+    coverage = {}
+    spares = []
+    emitted = 0
+    pending = list(range(len(plan)))
+
+    for round_number in range(rerequest_rounds + 1):
+        if not pending:
+            return
+        counts = _with_spares([plan[i][1] - produced[i] for i in pending], oversample)
+        prompts = [build_prompt(text_chunks[plan[i][0]], count) for i, count in zip(pending, counts)]
+        parsers = [new_parser() for _ in pending]
+
+        for local, delta in llm.stream_many(prompts):
+            parser = parsers[local]
+            i = pending[local]
+            found = parser.close() if delta is None else parser.feed(delta)
+            for question in found:
+                question["chunk"] = plan[i][0]
+                signature = index.signature(question)
+                if index.is_duplicate(signature):
+                    if stats is not None:
+                        stats.add("duplicates")
+                    continue
+                if produced[i] >= plan[i][1]:
+                    spares.append((question, signature))
+                    continue
+                index.add(signature)
+                produced[i] += 1
+                coverage[plan[i][0]] = coverage.get(plan[i][0], 0) + 1
+                emitted += 1
+                yield question
+                if emitted == num_questions:
+                    return
+
+        # Spares written by the model in the same responses replace what was dropped
+        for question in select_diverse(spares, num_questions - emitted, index, coverage):
+            emitted += 1
+            yield question
+        if emitted == num_questions:
+            return
+
+        pending = [i for i, parser in zip(pending, parsers) if parser.invalid and produced[i] < plan[i][1]]
+        if stats is not None and round_number < rerequest_rounds:
+            stats.add("rerequested", sum(plan[i][1] - produced[i] for i in pending))
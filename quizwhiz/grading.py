@@ -0,0 +1,177 @@
+"""Lenient answer grading for free-text answers.
+
+Answers and references are normalized (brackets, punctuation, articles, accents, case,
+number words) and then compared by edit distance, so "[Paris]", "paris." and "Pariss"
+all match "Paris". A question may list accepted alternatives under "synonyms".
+
+Typos must also start with the right letter and stay within MAX_EDITS_SHORT (or, for
+long answers, MAX_EDITS_LONG) edits, counting a swap of neighbouring letters as one.
+Technical opposites such as "exothermic"/"endothermic" are close by similarity alone.
+
+Cohorts are graded one question at a time: the distinct normalized answers to a question
+are compared against its references in a single vectorized numpy pass, so each distinct
+answer costs one edit distance however many students gave it.
+"""
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+# Minimum similarity (1 - edit distance / longer length) for a fuzzy match
+FUZZY_THRESHOLD = float(os.getenv("QUIZWHIZ_FUZZY_THRESHOLD", "0.8"))
+
+# Most edits a typo may have: one below LONG_ANSWER characters, two from there on
+MAX_EDITS_SHORT = 1
+MAX_EDITS_LONG = 2
+LONG_ANSWER = 13
+
+ARTICLES = {"a", "an", "the"}
+
+NUMBER_WORDS = {
+    word: str(value) for value, word in enumerate(
+        "zero one two three four five six seven eight nine ten eleven twelve thirteen fourteen "
+        "fifteen sixteen seventeen eighteen nineteen twenty".split()
+    )
+}
+
+_BRACKETS = re.compile(r"^\s*[\[\(\{<\"'`]+|[\]\)\}>\"'`]+\s*$")
+_DIGIT = re.compile(r"\d")
+
+
+@lru_cache(maxsize=65536)
+def normalize_answer(text):
+    """Canonical form used for comparison: "[The Eiffel-Tower!]" -> "eiffel tower"."""
+    if not text:
+        return ""
+    text = _BRACKETS.sub("", text)
+    # Drop accents, then map punctuation and symbols to spaces
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(
+        " " if unicodedata.category(char)[0] in "PS" else char
+        for char in text if not unicodedata.combining(char)
+    )
+    words = [NUMBER_WORDS.get(word, word) for word in text.casefold().split()]
+    # Only a leading article is dropped: "the moon" -> "moon", but "vitamin a" is kept
+    if len(words) > 1 and words[0] in ARTICLES:
+        words = words[1:]
+    return " ".join(words)
+
+
+def answer_at(submission, index):
+    """The answer to question index in a submission keyed by index (a dict) or listed in order."""
+    if isinstance(submission, dict):
+        return submission.get(index)
+    return submission[index] if index < len(submission) else None
+
+
+def _encode(strings):
+    """Code points of strings as a (len(strings), longest) int array padded with -1."""
+    import numpy as np
+
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=len(strings))
+    codes = np.full((len(strings), max(int(lengths.max(initial=0)), 1)), -1, dtype=np.int64)
+    for row, string in enumerate(strings):
+        codes[row, :len(string)] = [ord(char) for char in string]
+    return codes, lengths
+
+
+def edit_distances(reference, candidates, transpositions=False):
+    """Levenshtein distance from reference to every candidate, as a numpy array.
+
+    With transpositions, swapping two neighbouring characters counts as one edit
+    (optimal string alignment distance). The dynamic programme runs over the reference
+    characters; each step updates all candidates and all their prefixes at once.
+    Insertions within a row are resolved with a running minimum instead of a
+    per-character loop.
+    """
+    import numpy as np
+
+    codes, lengths = _encode(candidates)
+    offsets = np.arange(codes.shape[1] + 1)
+    row = np.broadcast_to(offsets, (len(candidates), offsets.size)).copy()
+    previous = None
+    for i, char in enumerate(reference, 1):
+        substitute = row[:, :-1] + (codes != ord(char))
+        delete = row[:, 1:] + 1
+        best = np.empty_like(row)
+        best[:, 0] = i
+        best[:, 1:] = np.minimum(substitute, delete)
+        if transpositions and i > 1:
+            # reference[i-2:i] swapped against candidate[j-2:j]
+            swapped = (codes[:, :-1] == ord(char)) & (codes[:, 1:] == ord(reference[i - 2]))
+            best[:, 2:] = np.where(swapped, np.minimum(best[:, 2:], previous[:, :-2] + 1), best[:, 2:])
+        previous = row
+        # best[j] = min over k <= j of best[k] + (j - k)
+        row = np.minimum.accumulate(best - offsets, axis=1) + offsets
+    return row[np.arange(len(candidates)), lengths]
+
+
+class Grader:
+    """Decides whether free-text answers match a question's answer.
+
+    threshold is the minimum similarity for a fuzzy match, which must also keep the first
+    letter and stay within the edit caps; answers containing digits (years, quantities)
+    must match exactly. synonyms maps a normalized answer to other
+    normalized answers accepted for it, on top of each question's own "synonyms".
+    """
+
+    def __init__(self, threshold=FUZZY_THRESHOLD, synonyms=None):
+        self.threshold = threshold
+        self.synonyms = synonyms or {}
+
+    def references(self, question):
+        answers = [question["answer"]] + list(question.get("synonyms") or [])
+        references = {normalize_answer(answer) for answer in answers}
+        for reference in list(references):
+            references.update(self.synonyms.get(reference, ()))
+        references.discard("")
+        return sorted(references)
+
+    def match(self, references, answers):
+        """Return a numpy bool array: which normalized answers match any reference."""
+        import numpy as np
+
+        answers = list(answers)
+        correct = np.zeros(len(answers), dtype=bool)
+        if not answers:
+            return correct
+        exact = set(references)
+        correct[:] = [answer in exact for answer in answers]
+
+        pending = np.flatnonzero(~correct & np.array([bool(answer) for answer in answers]))
+        if pending.size == 0:
+            return correct
+        candidates = [answers[i] for i in pending]
+        candidate_lengths = np.array([len(answer) for answer in candidates])
+        has_digit = np.array([bool(_DIGIT.search(answer)) for answer in candidates])
+        first_letters = np.array([answer[0] for answer in candidates])
+        for reference in references:
+            if _DIGIT.search(reference):
+                continue  # Numbers are right or wrong, never "close"
+            distances = edit_distances(reference, candidates, transpositions=True)
+            similarity = 1 - distances / np.maximum(candidate_lengths, len(reference))
+            max_edits = MAX_EDITS_LONG if len(reference) >= LONG_ANSWER else MAX_EDITS_SHORT
+            correct[pending] |= ((similarity >= self.threshold) & (distances <= max_edits)
+                                 & (first_letters == reference[0]) & ~has_digit)
+        return correct
+
+    def is_correct(self, question, answer):
+        return bool(self.match(self.references(question), [normalize_answer(answer or "")])[0])
+
+    def grade_cohort(self, questions, submissions):
+        """Grade every submission at once; return a (submissions, questions) numpy bool array.
+
+        Each submission maps question index to answer (a dict) or lists answers in order.
+        """
+        import numpy as np
+
+        graded = np.zeros((len(submissions), len(questions)), dtype=bool)
+        for index, question in enumerate(questions):
+            answers = [normalize_answer(answer_at(submission, index) or "") for submission in submissions]
+            # Grade each distinct normalized answer once, then scatter back to students
+            unique, inverse = np.unique(np.array(answers, dtype=object), return_inverse=True)
+            graded[:, index] = self.match(self.references(question), unique.tolist())[inverse.ravel()]
+        return graded
+
+
+default_grader = Grader()
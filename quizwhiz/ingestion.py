@@ -0,0 +1,180 @@
+"""Concurrent ingestion of several PDFs, each with its own page range.
+
+Documents are extracted on a small thread pool, so one large file does not hold up the
+rest, and they split the machine's cores between their extraction process pools. Page
+text is streamed into a spool per document that stays in memory up to that document's
+share of the memory ceiling and moves to disk beyond it. Chunking takes one completed
+document at a time, so only one document's text is ever materialized at once. Uploads
+larger than the ceiling are copied to a temporary file that extraction workers read on
+demand, instead of each receiving a copy of the file.
+"""
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from quizwhiz.cache import CACHE_DIR
+from quizwhiz.chunking import chunk_document
+from quizwhiz.extraction import CachedPdf, read_pdf_bytes
+from quizwhiz.metrics import metrics
+
+# Budget for uploads and buffered page text (QUIZWHIZ_MEMORY_CEILING_MB, default 256)
+MEMORY_CEILING = int(os.getenv("QUIZWHIZ_MEMORY_CEILING_MB", "256")) * 1024 * 1024
+
+# Documents extracted at the same time
+MAX_FILES = 4
+
+SPOOL_DIR = os.path.join(CACHE_DIR, "spool")
+
+# A document is reported about this many times while its pages are extracted
+PROGRESS_STEPS = 50
+
+Source = namedtuple("Source", "pdf start_page end_page name", defaults=(1, None, None))
+Progress = namedtuple("Progress", "index name pages_done pages_total done")
+# One ingested source: its page count, the page range actually read and its chunks
+Document = namedtuple("Document", "doc_hash num_pages start_page end_page chunks")
+
+
+def source_name(source):
+    if source.name:
+        return source.name
+    if isinstance(source.pdf, str):
+        return os.path.basename(source.pdf)
+    return getattr(source.pdf, "name", "document")
+
+
+def _upload_size(pdf):
+    if hasattr(pdf, "getbuffer"):
+        return pdf.getbuffer().nbytes
+    position = pdf.tell()
+    size = pdf.seek(0, os.SEEK_END)
+    pdf.seek(position)
+    return size
+
+
+def open_pdf(pdf, memory_ceiling=MEMORY_CEILING):
+    """Return (CachedPdf, spill_path) for a path or binary file object.
+
+    memory_ceiling is this document's share of the budget. Files larger than it are copied
+    to a temporary file in blocks; spill_path names it (None otherwise) and the caller
+    deletes it once extraction is done.
+    """
+    if isinstance(pdf, str):
+        return CachedPdf(pdf), None
+    if _upload_size(pdf) <= memory_ceiling:
+        return CachedPdf(read_pdf_bytes(pdf)), None
+
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    pdf.seek(0)
+    descriptor, spill_path = tempfile.mkstemp(dir=SPOOL_DIR, suffix=".pdf")
+    with os.fdopen(descriptor, "wb") as spill:
+        for block in iter(lambda: pdf.read(1024 * 1024), b""):
+            digest.update(block)
+            spill.write(block)
+    return CachedPdf(spill_path, doc_hash=digest.hexdigest()), spill_path
+
+
+class PageSpool:
+    """Page texts of one document, kept in memory up to max_bytes and on disk beyond."""
+
+    def __init__(self, max_bytes):
+        # newline="" keeps the stored lengths exact
+        self.file = tempfile.SpooledTemporaryFile(max_size=max_bytes, mode="w+", encoding="utf-8", newline="",
+                                                  dir=SPOOL_DIR)
+        self.pages = []  # (page_number, length in characters)
+
+    def add(self, number, text):
+        self.file.write(text)
+        self.pages.append((number, len(text)))
+
+    def read(self):
+        """Return [(page_number, text), ...] and release the spool."""
+        self.file.seek(0)
+        pages = [(number, self.file.read(length)) for number, length in self.pages]
+        self.file.close()
+        return pages
+
+
+def _extract(index, source, events, memory_ceiling, slots, max_workers):
+    """Spool the pages of one source, reporting progress to events; return (Document, spool)."""
+    name = source_name(source)
+    # Every document being extracted at once gets the same share of the ceiling, which
+    # its upload (unless spilled to disk) and its buffered page text must fit in together
+    share = memory_ceiling // slots
+    cached_pdf, spill_path = open_pdf(source.pdf, share)
+    try:
+        with metrics.timer("extract"):
+            num_pages = cached_pdf.num_pages
+            first = max(1, min(source.start_page or 1, num_pages))
+            last = max(first, min(source.end_page or num_pages, num_pages))
+            total = last - first + 1
+            step = max(1, total // PROGRESS_STEPS)
+            events.put(Progress(index, name, 0, total, False))
+
+            in_memory = len(cached_pdf.data) if isinstance(cached_pdf.data, bytes) else 0
+            spool = PageSpool(max(1, share - in_memory))
+            for number, text in enumerate(cached_pdf.iter_page_texts(first, last, max_workers), first):
+                spool.add(number, text)
+                done = number - first + 1
+                if done % step == 0 and done < total:
+                    events.put(Progress(index, name, done, total, False))
+            metrics.inc("quizwhiz_pages_total", total)
+            metrics.inc("quizwhiz_pdf_bytes_total", os.path.getsize(cached_pdf.data)
+                        if isinstance(cached_pdf.data, str) else len(cached_pdf.data))
+            return Document(cached_pdf.doc_hash, num_pages, first, last, None), spool
+    finally:
+        cached_pdf.close()
+        if spill_path is not None:
+            os.remove(spill_path)
+
+
+def ingest_documents(sources, on_progress=None, max_files=MAX_FILES, memory_ceiling=MEMORY_CEILING, shares=1):
+    """Extract and chunk every Source concurrently and return a Document per source, in order.
+
+    on_progress(Progress) is called on the calling thread, a few dozen times per document
+    while its pages are extracted and once more when it has been chunked. shares is the
+    number of ingest calls running side by side (batch jobs); they split the cores and
+    the memory ceiling evenly.
+    """
+    sources = [source if isinstance(source, Source) else Source(source) for source in sources]
+    if not sources:
+        return []
+    files = max(1, min(max_files, len(sources)))
+    slots = files * max(1, shares)
+    max_workers = max(1, (os.cpu_count() or 1) // slots)
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    events = queue.Queue()
+    chunk_lock = threading.Lock()
+
+    def run(index, source):
+        document, spool = _extract(index, source, events, memory_ceiling, slots, max_workers)
+        total = len(spool.pages)
+        with chunk_lock:
+            document = document._replace(chunks=chunk_document(document.doc_hash, spool.read()))
+        events.put(Progress(index, source_name(source), total, total, True))
+        return document
+
+    with metrics.timer("ingest"), ThreadPoolExecutor(files, thread_name_prefix="quizwhiz-ingest") as pool:
+        futures = [pool.submit(run, index, source) for index, source in enumerate(sources)]
+        finished = 0
+        while finished < len(futures):
+            try:
+                progress = events.get(timeout=0.1)
+            except queue.Empty:
+                if any(future.done() and future.exception() for future in futures):
+                    break  # Surface the error below instead of waiting for the other files
+                continue
+            finished += progress.done
+            if on_progress is not None:
+                on_progress(progress)
+        return [future.result() for future in futures]
+
+
+def ingest(sources, on_progress=None, max_files=MAX_FILES, memory_ceiling=MEMORY_CEILING):
+    """Like ingest_documents, but return the chunks of every source in source order."""
+    documents = ingest_documents(sources, on_progress, max_files, memory_ceiling)
+    return [chunk for document in documents for chunk in document.chunks]
@@ -0,0 +1,297 @@
+import asyncio
+import hashlib
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque, namedtuple
+
+from quizwhiz.fake_llm import FakeLLM
+from quizwhiz.metrics import metrics
+
+DEFAULT_MODEL = "gemini-1.5-pro"
+
+# One record per successful call, kept for latency and token reporting
+CallRecord = namedtuple("CallRecord", "model latency attempts prompt_tokens completion_tokens")
+
+# Token counts a backend reports for a streamed call, yielded after its last text delta
+Usage = namedtuple("Usage", "prompt_tokens completion_tokens")
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) for backends that do not report usage."""
+    return max(1, len(text) // 4)
+
+
+class GeminiBackend:
+    """Calls Gemini through one long-lived LangChain chat model per (model, temperature)."""
+
+    def __init__(self, model, temperature):
+        from langchain.schema import HumanMessage
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        self._message = HumanMessage
+        self._model = ChatGoogleGenerativeAI(model=model, temperature=temperature)
+
+    async def complete(self, prompt):
+        response = await self._model.ainvoke([self._message(content=prompt)])
+        text = response.content if hasattr(response, "content") else response
+        usage = getattr(response, "usage_metadata", None) or {}
+        return text, usage.get("input_tokens"), usage.get("output_tokens")
+
+    async def stream(self, prompt):
+        usage = None
+        async for chunk in self._model.astream([self._message(content=prompt)]):
+            if chunk.content:
+                yield chunk.content
+            # Gemini reports usage on the final chunk of the stream
+            usage = getattr(chunk, "usage_metadata", None) or usage
+        if usage:
+            yield Usage(usage.get("input_tokens"), usage.get("output_tokens"))
+
+
+class StubBackend:
+    """Deterministic in-process backend that answers with FakeLLM output after a simulated delay.
+
+    Latency is drawn from a log-normal distribution seeded by the prompt, so a run is
+    reproducible, and failure_rate makes that share of first attempts raise to exercise retries.
+    """
+
+    def __init__(self, model=DEFAULT_MODEL, temperature=0.0, latency=0.05, sigma=0.5, failure_rate=0.0):
+        self.latency = latency
+        self.sigma = sigma
+        self.failure_rate = failure_rate
+        self._llm = FakeLLM()
+        self._attempts = {}
+
+    def _attempt(self, prompt):
+        """Return (delay, fails) for the next attempt at prompt."""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        attempt = self._attempts.get(digest, 0)
+        self._attempts[digest] = attempt + 1
+        rng = random.Random(f"{digest}:{attempt}")
+        delay = self.latency * rng.lognormvariate(0, self.sigma)
+        return delay, attempt == 0 and rng.random() < self.failure_rate
+
+    async def complete(self, prompt):
+        delay, fails = self._attempt(prompt)
+        await asyncio.sleep(delay)
+        if fails:
+            raise ConnectionError("stub backend simulated a transient failure")
+        text = self._llm(prompt)
+        return text, estimate_tokens(prompt), estimate_tokens(text)
+
+    async def stream(self, prompt):
+        delay, fails = self._attempt(prompt)
+        if fails:
+            await asyncio.sleep(delay)
+            raise ConnectionError("stub backend simulated a transient failure")
+        # Spread the simulated latency over word-sized tokens, like a streaming API would
+        tokens = re.findall(r"\S+\s*|\s+", self._llm(prompt))
+        for token in tokens:
+            await asyncio.sleep(delay / len(tokens))
+            yield token
+
+
+BACKENDS = {"gemini": GeminiBackend, "stub": StubBackend}
+
+
+class LLMClient:
+    """Asyncio LLM client shared by every page and script thread of the process.
+
+    Requests run on a private event loop thread, so backends and their HTTP connections
+    are created once and reused. Concurrency is capped by a semaphore, each attempt has a
+    timeout and failed attempts are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, backend_factory, max_concurrency=8, max_retries=3, timeout=120.0, backoff=1.0):
+        self.backend_factory = backend_factory
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.records = deque(maxlen=10000)
+        self._backends = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="quizwhiz-llm", daemon=True).start()
+
+    def _record(self, record):
+        self.records.append(record)
+        metrics.inc("quizwhiz_llm_calls_total", model=record.model)
+        metrics.inc("quizwhiz_llm_prompt_tokens_total", record.prompt_tokens, model=record.model)
+        metrics.inc("quizwhiz_llm_completion_tokens_total", record.completion_tokens, model=record.model)
+        metrics.observe("quizwhiz_llm_call_seconds", record.latency, model=record.model)
+
+    def _failed(self, model, attempt):
+        """Count a failed attempt; return True when it was the last one."""
+        if attempt > self.max_retries:
+            metrics.inc("quizwhiz_llm_errors_total", model=model)
+            return True
+        metrics.inc("quizwhiz_llm_retries_total", model=model)
+        return False
+
+    def _backend(self, model, temperature):
+        key = (model, temperature)
+        if key not in self._backends:
+            self._backends[key] = self.backend_factory(model, temperature)
+        return self._backends[key]
+
+    async def acomplete(self, prompt, model=DEFAULT_MODEL, temperature=0.5):
+        """Return the completion text for prompt, retrying transient failures."""
+        backend = self._backend(model, temperature)
+        for attempt in range(1, self.max_retries + 2):
+            async with self._semaphore:
+                started = time.perf_counter()
+                try:
+                    text, prompt_tokens, completion_tokens = await asyncio.wait_for(
+                        backend.complete(prompt), self.timeout
+                    )
+                except Exception:
+                    if self._failed(model, attempt):
+                        raise
+                else:
+                    self._record(CallRecord(
+                        model, time.perf_counter() - started, attempt,
+                        prompt_tokens or estimate_tokens(prompt),
+                        completion_tokens or estimate_tokens(text),
+                    ))
+                    return text
+            # Sleep outside the semaphore so waiting retries do not block other requests
+            await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    async def astream(self, prompt, model=DEFAULT_MODEL, temperature=0.5):
+        """Yield completion text for prompt as it arrives.
+
+        Failures before the first token are retried like acomplete; once text has been
+        yielded the error is raised to the caller. The timeout applies between tokens.
+        """
+        backend = self._backend(model, temperature)
+        for attempt in range(1, self.max_retries + 2):
+            async with self._semaphore:
+                started = time.perf_counter()
+                parts = []
+                usage = Usage(None, None)
+                stream = backend.stream(prompt)
+                try:
+                    while True:
+                        try:
+                            delta = await asyncio.wait_for(stream.__anext__(), self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        if isinstance(delta, Usage):
+                            usage = delta
+                            continue
+                        parts.append(delta)
+                        yield delta
+                except Exception:
+                    if parts:
+                        metrics.inc("quizwhiz_llm_errors_total", model=model)
+                        raise
+                    if self._failed(model, attempt):
+                        raise
+                else:
+                    text = "".join(parts)
+                    self._record(CallRecord(
+                        model, time.perf_counter() - started, attempt,
+                        usage.prompt_tokens or estimate_tokens(prompt),
+                        usage.completion_tokens or estimate_tokens(text),
+                    ))
+                    return
+            await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    async def acomplete_many(self, prompts, **settings):
+        return await asyncio.gather(*(self.acomplete(prompt, **settings) for prompt in prompts))
+
+    def complete(self, prompt, **settings):
+        """Blocking wrapper around acomplete for the Streamlit script thread."""
+        return asyncio.run_coroutine_threadsafe(self.acomplete(prompt, **settings), self._loop).result()
+
+    def complete_many(self, prompts, **settings):
+        """Run all prompts concurrently (up to the concurrency cap) and return texts in order."""
+        return asyncio.run_coroutine_threadsafe(self.acomplete_many(prompts, **settings), self._loop).result()
+
+    def stream_many(self, prompts, **settings):
+        """Stream all prompts concurrently, yielding (index, text) as text arrives.
+
+        (index, None) marks the end of prompt index. Abandoning the iterator cancels
+        whatever is still running.
+        """
+        events = queue.Queue()
+
+        async def pump(index, prompt):
+            try:
+                async for delta in self.astream(prompt, **settings):
+                    events.put((index, delta, None))
+            except Exception as exc:
+                events.put((index, None, exc))
+            else:
+                events.put((index, None, None))
+
+        futures = [asyncio.run_coroutine_threadsafe(pump(i, p), self._loop) for i, p in enumerate(prompts)]
+        try:
+            remaining = len(prompts)
+            while remaining:
+                index, delta, error = events.get()
+                if error is not None:
+                    raise error
+                if delta is None:
+                    remaining -= 1
+                yield index, delta
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def bind(self, **settings):
+        return BoundLLM(self, settings)
+
+    def stats(self):
+        """Summarize recorded calls: count, latency percentiles, retries and token totals."""
+        records = list(self.records)
+        if not records:
+            return {"calls": 0}
+        latencies = sorted(r.latency for r in records)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "calls": len(records),
+            "p50_latency": percentile(0.50),
+            "p99_latency": percentile(0.99),
+            "retries": sum(r.attempts - 1 for r in records),
+            "prompt_tokens": sum(r.prompt_tokens for r in records),
+            "completion_tokens": sum(r.completion_tokens for r in records),
+        }
+
+
+class BoundLLM:
+    """An LLMClient with fixed model settings, as passed to the generation pipeline."""
+
+    def __init__(self, client, settings):
+        self.client = client
+        self.settings = settings
+
+    def __call__(self, prompt):
+        return self.client.complete(prompt, **self.settings)
+
+    def complete_many(self, prompts):
+        return self.client.complete_many(prompts, **self.settings)
+
+    def stream_many(self, prompts):
+        return self.client.stream_many(prompts, **self.settings)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide client; QUIZWHIZ_LLM_BACKEND=stub selects the offline backend."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            backend = BACKENDS[os.getenv("QUIZWHIZ_LLM_BACKEND", "gemini")]
+            _client = LLMClient(backend, max_concurrency=int(os.getenv("QUIZWHIZ_LLM_CONCURRENCY", "8")))
+        return _client
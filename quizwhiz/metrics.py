@@ -0,0 +1,280 @@
+"""Process-wide metrics with a Prometheus text exposition endpoint.
+
+Pipeline stages are timed into latency histograms (quizwhiz_stage_seconds) and the
+pipeline counts pages, bytes, model tokens and calls as it goes. Cache hit rates and
+parse outcomes are read from their own counters whenever the metrics are rendered.
+
+Set QUIZWHIZ_METRICS_PORT to serve /metrics (and /debug/profile, see
+quizwhiz.profiling) from a background thread of the app or batch process.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, from a cached chunk lookup up to a slow model call
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+HELP = {
+    "quizwhiz_stage_seconds": "Time spent in each pipeline stage.",
+    "quizwhiz_first_question_seconds": "Time from the start of generation to the first parsed question.",
+    "quizwhiz_llm_call_seconds": "Latency of successful model calls, including streaming.",
+    "quizwhiz_llm_calls_total": "Successful model calls.",
+    "quizwhiz_llm_retries_total": "Model call attempts that failed and were retried.",
+    "quizwhiz_llm_errors_total": "Model calls that failed after their last retry.",
+    "quizwhiz_llm_prompt_tokens_total": "Prompt tokens sent to the model.",
+    "quizwhiz_llm_completion_tokens_total": "Completion tokens received from the model.",
+    "quizwhiz_pdf_bytes_total": "Bytes of PDF input read.",
+    "quizwhiz_pages_total": "PDF pages extracted or served from the page cache.",
+    "quizwhiz_ocr_pages_total": "Image-only pages sent to OCR (cache misses only).",
+    "quizwhiz_ocr_errors_total": "Pages whose OCR failed and kept their text layer.",
+    "quizwhiz_export_bytes_total": "Bytes of quiz PDF written.",
+    "quizwhiz_questions_total": "Questions produced by generation.",
+    "quizwhiz_cache_hits_total": "Disk cache lookups that found an entry.",
+    "quizwhiz_cache_misses_total": "Disk cache lookups that found nothing.",
+    "quizwhiz_cache_bytes": "Bytes held by each disk cache.",
+    "quizwhiz_parse_items_total": "Generated items by parse outcome.",
+}
+
+_server = None
+_server_lock = threading.Lock()
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.buckets[i - 1] if i else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class Metrics:
+    """Thread-safe counters and histograms keyed by metric name and labels."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the block into quizwhiz_stage_seconds{stage=...}, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("quizwhiz_stage_seconds", time.perf_counter() - started, stage=stage)
+
+    def timed(self, stage):
+        """Decorator form of timer."""
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def timed_iter(self, stage, items, first=None):
+        """Yield from items, timing creation to exhaustion as stage and the first item as first."""
+        started = time.perf_counter()
+        count = 0
+        try:
+            for item in items:
+                if not count and first is not None:
+                    self.observe(first, time.perf_counter() - started)
+                count += 1
+                yield item
+        finally:
+            self.observe("quizwhiz_stage_seconds", time.perf_counter() - started, stage=stage)
+
+    def add_collector(self, collect):
+        """Register collect(), returning (name, kind, labels, value) samples read at render time."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def samples(self):
+        """Return snapshots of (counters, histograms, metric kinds), collected samples included."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count) for key, h in self.histograms.items()}
+            collectors = list(self._collectors)
+        kinds = {name: "counter" for name, _ in counters}
+        for collect in collectors:
+            for name, kind, labels, value in collect():
+                counters[(name, tuple(sorted(labels.items())))] = value
+                kinds[name] = kind
+        return counters, histograms, kinds
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        counters, histograms, kinds = self.samples()
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} {kinds[name]}")
+            for (sample_name, labels), value in sorted(counters.items()):
+                if sample_name == name:
+                    lines.append(f"{name}{_label_text(labels)} {value}")
+        for name in sorted({name for name, _ in histograms}):
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} histogram")
+            for (sample_name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+                if sample_name != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(labels)} {total}")
+                lines.append(f"{name}_count{_label_text(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def _collect_caches():
+    from quizwhiz.cache import _caches
+
+    for name, cache in list(_caches.items()):
+        labels = {"cache": name}
+        yield "quizwhiz_cache_hits_total", "counter", labels, cache.hits
+        yield "quizwhiz_cache_misses_total", "counter", labels, cache.misses
+        yield "quizwhiz_cache_bytes", "gauge", labels, cache.stats()["bytes"]
+
+
+def _collect_parse():
+    from quizwhiz.streaming import parse_totals
+
+    for outcome in ("parsed", "repaired", "rejected", "rerequested", "duplicates"):
+        yield "quizwhiz_parse_items_total", "counter", {"outcome": outcome}, getattr(parse_totals, outcome)
+
+
+metrics.add_collector(_collect_caches)
+metrics.add_collector(_collect_parse)
+
+
+def stage_summary():
+    """Per-stage rows for the diagnostics panel: calls, total, p50 and p99 seconds."""
+    rows = []
+    with metrics._lock:
+        histograms = [(dict(labels).get("stage"), h) for (name, labels), h in metrics.histograms.items()
+                      if name == "quizwhiz_stage_seconds"]
+        for stage, histogram in sorted(histograms):
+            rows.append({
+                "stage": stage,
+                "calls": histogram.count,
+                "total s": round(histogram.sum, 3),
+                "p50 s": round(histogram.quantile(0.5), 3),
+                "p99 s": round(histogram.quantile(0.99), 3),
+            })
+    return rows
+
+
+def counter_total(name, **labels):
+    """Sum a counter over every label set matching labels."""
+    counters, _, _ = metrics.samples()
+    wanted = set(labels.items())
+    return sum(value for (sample_name, sample_labels), value in counters.items()
+               if sample_name == name and wanted <= set(sample_labels))
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve /metrics and /debug/profile from a daemon thread; return the server (once per process)."""
+    global _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/metrics":
+                body = metrics.render()
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/debug/profile":
+                from quizwhiz.profiling import get_profiler
+
+                profiler = get_profiler()
+                body = profiler.collapsed() if profiler else "profiler not running (set QUIZWHIZ_PROFILE_HZ)\n"
+                content_type = "text/plain; charset=utf-8"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # Scrapes every few seconds would flood the app log
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), Handler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="quizwhiz-metrics", daemon=True).start()
+        return _server
+
+
+def start_from_env():
+    """Start the endpoint and the sampling profiler when QUIZWHIZ_METRICS_PORT / QUIZWHIZ_PROFILE_HZ are set."""
+    from quizwhiz.profiling import start_profiler_from_env
+
+    start_profiler_from_env()
+    port = os.getenv("QUIZWHIZ_METRICS_PORT")
+    if port:
+        try:
+            # Local only unless QUIZWHIZ_METRICS_HOST opens it up, since /debug/profile exposes stacks
+            return start_http_server(int(port), os.getenv("QUIZWHIZ_METRICS_HOST", "127.0.0.1"))
+        except OSError:
+            return None  # Another server process on this host already exposes the port
+    return None
@@ -0,0 +1,107 @@
+"""OCR fallback for image-only PDF pages.
+
+Scanned pages have no text layer, so extract_text() returns next to nothing for them.
+Pages like that which carry images are recognized with Tesseract (the optional
+pytesseract package plus the tesseract binary) on a process pool shared by the whole
+process, so concurrent uploads cannot start more OCR processes than OCR_WORKERS.
+Results are cached under the SHA-256 of the page's image data, so a scan is recognized
+once, whichever document it turns up in. Pages with a usable text layer are never OCRed.
+"""
+import hashlib
+import importlib.util
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from io import BytesIO
+
+from quizwhiz.cache import get_cache
+from quizwhiz.config import worker_context
+from quizwhiz.metrics import metrics
+
+# "auto" runs OCR when Tesseract is installed, "0" turns it off
+OCR_MODE = os.getenv("QUIZWHIZ_OCR", "auto")
+OCR_LANGUAGE = os.getenv("QUIZWHIZ_OCR_LANG", "eng")
+OCR_WORKERS = int(os.getenv("QUIZWHIZ_OCR_WORKERS", "0")) or max(1, (os.cpu_count() or 2) // 2)
+
+# Pages whose text layer has fewer characters than this are treated as image-only
+MIN_TEXT_CHARS = 16
+
+# Bump when preprocessing changes so cached recognitions are redone
+OCR_VERSION = 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def ocr_available():
+    return importlib.util.find_spec("pytesseract") is not None and shutil.which("tesseract") is not None
+
+
+def ocr_enabled():
+    return OCR_MODE != "0" and ocr_available()
+
+
+def needs_ocr(text):
+    return len(text.strip()) < MIN_TEXT_CHARS
+
+
+def page_images(page):
+    """Return the encoded images drawn on a PyPDF2 page, or [] if it has none or they cannot be read."""
+    try:
+        return [image.data for image in page.images]
+    except Exception:
+        return []  # Unsupported filters or broken streams; the page keeps its (empty) text
+
+
+def images_hash(images):
+    digest = hashlib.sha256()
+    for data in images:
+        digest.update(hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+
+def recognize(images, language=OCR_LANGUAGE):
+    """Run Tesseract over a page's images and return the recognized text (in a worker process)."""
+    import pytesseract
+    from PIL import Image, ImageOps
+
+    texts = []
+    for data in images:
+        # Grayscale with stretched contrast suits Tesseract better than raw scans
+        image = ImageOps.autocontrast(ImageOps.grayscale(Image.open(BytesIO(data))))
+        texts.append(pytesseract.image_to_string(image, lang=language))
+    return "\n".join(text.strip() for text in texts if text.strip())
+
+
+def get_ocr_cache():
+    return get_cache("ocr")
+
+
+def get_ocr_pool():
+    """Return the process-wide OCR pool of OCR_WORKERS processes, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(OCR_WORKERS, mp_context=worker_context())
+        return _pool
+
+
+def ocr_page(images, language=OCR_LANGUAGE):
+    """Return a Future for the text of a page made of images, served from the cache if possible."""
+    key = f"{OCR_VERSION}:{language}:{images_hash(images)}"
+    cached = get_ocr_cache().get(key)
+    if cached is not None:
+        done = Future()
+        done.set_result(cached.decode("utf-8"))
+        return done
+
+    metrics.inc("quizwhiz_ocr_pages_total")
+    future = get_ocr_pool().submit(recognize, images, language)
+
+    def store(finished):
+        if finished.exception() is None:
+            get_ocr_cache().set(key, finished.result().encode("utf-8"))
+
+    future.add_done_callback(store)
+    return future
@@ -0,0 +1,84 @@
+"""Ingestion -> chunking -> generation -> parsing -> export, usable with or without Streamlit.
+
+    from quizwhiz.pipeline import generate_quiz
+    from quizwhiz.export import generate_pdf
+
+    questions = generate_quiz(["chapter1.pdf"], "mcq", num_questions=10)
+"""
+from quizwhiz.generation import stream_generate
+from quizwhiz.ingestion import Source, ingest
+from quizwhiz.llm import get_client
+from quizwhiz.metrics import metrics
+from quizwhiz.question_types import get_question_type
+from quizwhiz.response_cache import CachedLLM, reuse_document_questions
+from quizwhiz.retrieval import select_chunks
+
+
+def default_llm(question_type):
+    """The shared client bound to the type's model settings, behind the response cache."""
+    return CachedLLM(get_client().bind(model=question_type.model, temperature=question_type.temperature))
+
+
+def _tag_pages(questions, text_chunks):
+    for question in questions:
+        chunk = text_chunks[question["chunk"]]
+        if hasattr(chunk, "first_page"):
+            question["pages"] = [chunk.first_page, chunk.last_page]
+        yield question
+
+
+def _count(kind, questions):
+    for question in questions:
+        metrics.inc("quizwhiz_questions_total", kind=kind)
+        yield question
+
+
+def stream_questions(text_chunks, kind, num_questions, llm=None, reuse_document=False, rejected=None,
+                     structured=False, stats=None, retrieve=False):
+    """Yield questions of the given type as the model streams them, across every text chunk.
+
+    text_chunks are strings or Chunk objects; questions from a Chunk are tagged with its
+    source "pages" as well as the "chunk" index. rejected collects the raw text of items
+    that failed to parse and stats (a ParseStats) counts parse outcomes. With
+    reuse_document, an identical earlier request is served from the response cache.
+    With retrieve, only the most informative, least redundant chunks that fit the
+    context budget are used (see quizwhiz.retrieval).
+    """
+    question_type = get_question_type(kind)
+    if retrieve:
+        text_chunks = select_chunks(text_chunks, num_questions)
+    if llm is None:
+        llm = default_llm(question_type)
+
+    def build_prompt(context, count):
+        return question_type.build_prompt(context, count, structured)
+
+    def new_parser():
+        return question_type.new_parser(rejected, stats, structured)
+
+    texts = [getattr(chunk, "text", chunk) for chunk in text_chunks]
+
+    # Each chunk is its own streamed request, so the whole page range is covered concurrently
+    def generate():
+        questions = _tag_pages(stream_generate(texts, num_questions, build_prompt, new_parser, llm, stats), text_chunks)
+        return _count(kind, metrics.timed_iter("generate", questions, first="quizwhiz_first_question_seconds"))
+
+    if reuse_document:
+        settings = dict(getattr(llm, "settings", {}), structured=structured)
+        return reuse_document_questions(kind, settings, texts, num_questions, generate)
+    return generate()
+
+
+def generate_questions(text_chunks, kind, num_questions, **options):
+    """Like stream_questions, but return the complete list."""
+    return list(stream_questions(text_chunks, kind, num_questions, **options))
+
+
+def generate_quiz(pdf_docs, kind, num_questions, start_page=1, end_page=None, on_progress=None, **options):
+    """Run the whole pipeline over PDF files and return the questions.
+
+    pdf_docs holds paths, binary file objects or ingestion Sources, which carry their own
+    page range; start_page and end_page apply to the others.
+    """
+    sources = [pdf if isinstance(pdf, Source) else Source(pdf, start_page, end_page) for pdf in pdf_docs]
+    return generate_questions(ingest(sources, on_progress), kind, num_questions, **options)
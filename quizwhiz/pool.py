@@ -0,0 +1,117 @@
+"""Per-document question pools that are filled ahead of demand.
+
+A pool holds questions generated for one question type and one set of text chunks (the
+selected pages of a document). Quizzes are drawn from it straight from the database,
+least served questions first, with options shuffled for every draw. A pool starts out
+with the questions of the first quiz generated for its pages; only once a quiz has been
+drawn from it, and fewer than a low-water mark of unserved questions remain, does a
+background worker generate more. One-off documents thus cost no more than one quiz.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from quizwhiz.dedup import NearDuplicateIndex
+from quizwhiz.llm import get_client
+from quizwhiz.pipeline import generate_questions
+from quizwhiz.question_types import get_question_type
+from quizwhiz.response_cache import cache_key, reshuffle
+from quizwhiz.store import get_store
+
+# A pool is topped up to POOL_SIZE once fewer than LOW_WATER questions are unserved
+POOL_SIZE = 60
+LOW_WATER = 20
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool_key(kind, text_chunks, retrieve=False):
+    return cache_key("pool", kind, text_chunks, retrieve)
+
+
+class QuestionPool:
+    """Draws quizzes from stored pools and refills them on worker threads."""
+
+    def __init__(self, store=None, size=POOL_SIZE, low_water=LOW_WATER, max_workers=2):
+        self.store = store if store is not None else get_store()
+        self.size = size
+        self.low_water = low_water
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quizwhiz-pool")
+        self._refilling = set()
+        self._lock = threading.Lock()
+
+    def draw(self, key, count):
+        """Return count questions with freshly shuffled options, or None if the pool is too small."""
+        questions = self.store.draw_pool_questions(key, count)
+        return reshuffle(questions) if questions else None
+
+    def add(self, key, questions, served=0):
+        """Store the questions that are not near-duplicates of the pool's; return how many were added."""
+        index = NearDuplicateIndex()
+        for question in self.store.pool_questions(key):
+            index.add(index.signature(question))
+        fresh = []
+        for question in questions:
+            signature = index.signature(question)
+            if not index.is_duplicate(signature):
+                index.add(signature)
+                fresh.append(question)
+        self.store.add_pool_questions(key, fresh, served)
+        return len(fresh)
+
+    def refill(self, key, kind, text_chunks, num_questions=0, structured=True, retrieve=False):
+        """Top the pool up in the background if it is below its low-water mark.
+
+        The pool is kept large enough to serve num_questions at least twice.
+        """
+        with self._lock:
+            if key in self._refilling:
+                return None
+            self._refilling.add(key)
+        return self._executor.submit(self._refill, key, kind, text_chunks, num_questions, structured, retrieve)
+
+    def _refill(self, key, kind, text_chunks, num_questions, structured, retrieve):
+        try:
+            _, unserved = self.store.pool_counts(key)
+            if unserved >= max(self.low_water, num_questions):
+                return 0
+            question_type = get_question_type(kind)
+            # Bypass the response cache: identical prompts would only return the pool's own questions
+            llm = get_client().bind(model=question_type.model, temperature=question_type.temperature)
+            wanted = max(self.size, 2 * num_questions) - unserved
+            questions = generate_questions(text_chunks, kind, wanted, llm=llm, structured=structured,
+                                           retrieve=retrieve)
+            return self.add(key, questions)
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def serve(self, kind, text_chunks, num_questions, generate, structured=True, retrieve=False):
+        """Return an iterator over the quiz's questions, from the pool whenever it is big enough.
+
+        A quiz drawn from the pool is demand for more, so the pool is then refilled in the
+        background. Otherwise the questions come from generate() and are added to the pool
+        as already served, without a refill.
+        """
+        key = pool_key(kind, text_chunks, retrieve)
+        drawn = self.draw(key, num_questions)
+        if drawn is not None:
+            self.refill(key, kind, text_chunks, num_questions, structured, retrieve)
+            return iter(drawn)
+        return self._absorb(key, generate())
+
+    def _absorb(self, key, questions_iter):
+        questions = []
+        for question in questions_iter:
+            questions.append(question)
+            yield question
+        self.add(key, questions, served=1)
+
+
+def get_pool():
+    """Return the process-wide question pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = QuestionPool()
+        return _pool
@@ -0,0 +1,123 @@
+"""Low-overhead sampling profiler that can stay switched on in production.
+
+A daemon thread wakes QUIZWHIZ_PROFILE_HZ times a second, records the Python stack of
+every other thread and counts identical stacks. Nothing is traced between samples, so
+the cost is a few microseconds per thread per sample whatever the workload does.
+
+The counts are served in the collapsed-stack format ("frame;frame;frame count" per
+line) read by flamegraph.pl and speedscope, at /debug/profile of the metrics endpoint.
+"""
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# Distinct stacks kept; once full, new stacks are counted under a single overflow entry
+MAX_STACKS = 20000
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Counts the stacks of all threads, sampled hz times a second."""
+
+    def __init__(self, hz=100, max_stacks=MAX_STACKS):
+        self.interval = 1.0 / hz
+        self.max_stacks = max_stacks
+        self.samples = 0
+        self.stacks = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="quizwhiz-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            sampled = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, "thread"))
+                sampled.append(";".join(reversed(stack)))
+            with self._lock:
+                self.samples += 1
+                for stack in sampled:
+                    if stack in self.stacks or len(self.stacks) < self.max_stacks:
+                        self.stacks[stack] += 1
+                    else:
+                        self.stacks["[overflow]"] += 1
+
+    def collapsed(self, reset=False):
+        """Return the stack counts in collapsed-stack format, most frequent first."""
+        with self._lock:
+            stacks = self.stacks
+            if reset:
+                self.stacks = Counter()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+    def top(self, limit=10):
+        """Return (function, share of samples) for the innermost frames seen most often."""
+        leaves = Counter()
+        with self._lock:
+            for stack, count in self.stacks.items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+            total = sum(leaves.values())
+        return [(name, count / total) for name, count in leaves.most_common(limit)] if total else []
+
+
+def get_profiler():
+    """Return the running process-wide profiler, or None when profiling is off."""
+    return _profiler
+
+
+def start_profiler(hz=100):
+    """Start the process-wide profiler if it is not running yet and return it."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = SamplingProfiler(hz).start()
+        return _profiler
+
+
+def start_profiler_from_env():
+    hz = os.getenv("QUIZWHIZ_PROFILE_HZ")
+    if hz and float(hz) > 0:
+        return start_profiler(float(hz))
+    return None
+
+
+@contextmanager
+def profile_block(hz=1000):
+    """Profile just the enclosed block at a high rate, for ad hoc investigations:
+
+        with profile_block() as profiler:
+            generate_quiz(...)
+        print(profiler.collapsed())
+    """
+    profiler = SamplingProfiler(hz).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
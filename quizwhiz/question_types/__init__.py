@@ -0,0 +1,9 @@
+"""Question type plugins.
+
+Each plugin subclasses QuestionType and registers itself with @register; the pipeline
+looks types up by name, so a new type only needs a module imported here.
+"""
+from quizwhiz.question_types.base import QUESTION_TYPES, QuestionType, get_question_type, register
+from quizwhiz.question_types import fill_in_blank, mcq  # noqa: F401  (registers the built-in types)
+
+__all__ = ["QUESTION_TYPES", "QuestionType", "get_question_type", "register"]
@@ -0,0 +1,85 @@
+from quizwhiz.grading import answer_at
+from quizwhiz.llm import DEFAULT_MODEL
+from quizwhiz.structured import JSONStreamParser, build_json_prompt
+
+QUESTION_TYPES = {}
+
+
+def register(cls):
+    """Class decorator adding a QuestionType subclass to the registry under cls.name."""
+    QUESTION_TYPES[cls.name] = cls()
+    return cls
+
+
+def get_question_type(name):
+    try:
+        return QUESTION_TYPES[name]
+    except KeyError:
+        raise ValueError(f"Unknown question type {name!r}; expected one of {sorted(QUESTION_TYPES)}") from None
+
+
+class QuestionType:
+    """Everything the pipeline needs to know about one kind of question.
+
+    Subclasses set the class attributes and implement the parser, repair and
+    formatting hooks.
+    """
+
+    name = None
+    title = None
+    model = DEFAULT_MODEL
+    temperature = 0.5
+    # Free-text prompt with {count} and {context} placeholders
+    prompt_template = None
+    # JSON schema and instructions used by the structured output mode
+    schema = None
+    instructions = None
+
+    def build_prompt(self, context, count, structured=False):
+        if structured:
+            return build_json_prompt(self.schema, self.instructions, context, count)
+        return self.prompt_template.format(count=count, context=context)
+
+    def new_parser(self, rejected=None, stats=None, structured=False):
+        if structured:
+            return JSONStreamParser(self.repair, rejected, stats)
+        return self.line_parser(rejected, stats)
+
+    def line_parser(self, rejected=None, stats=None):
+        """Return an incremental parser for the free-text prompt format."""
+        raise NotImplementedError
+
+    def repair(self, item):
+        """Validate a decoded JSON object; return (question, repaired) or (None, False)."""
+        raise NotImplementedError
+
+    def pdf_lines(self, question):
+        """Return the (indent, text) lines printed below a question in the exported PDF."""
+        return []
+
+    def is_correct(self, question, answer):
+        return bool(answer) and answer.strip().lower() == question["answer"].strip().lower()
+
+    def grade_cohort(self, questions, submissions):
+        """Return a (submissions, questions) numpy bool array marking correct answers.
+
+        Each submission maps question index to answer, or lists the answers in order.
+        """
+        import numpy as np
+
+        graded = np.zeros((len(submissions), len(questions)), dtype=bool)
+        for row, submission in enumerate(submissions):
+            graded[row] = [
+                self.is_correct(question, answer_at(submission, i)) for i, question in enumerate(questions)
+            ]
+        return graded
+
+    def score(self, questions, answers):
+        """Return (score, [(question, correct answer), ...]) for answers keyed by question index."""
+        score = 0
+        correct_answers = []
+        for i, question in enumerate(questions):
+            if self.is_correct(question, answers.get(i)):
+                score += 1
+            correct_answers.append((question["question"], question["answer"]))
+        return score, correct_answers
@@ -0,0 +1,88 @@
+import re
+
+from quizwhiz.grading import default_grader
+from quizwhiz.question_types.base import QuestionType, register
+from quizwhiz.structured import array_schema, text_field
+from quizwhiz.streaming import FillBlankStreamParser, strip_numbering
+
+BLANK = "_____"
+
+
+@register
+class FillInBlank(QuestionType):
+    name = "fill_in_blank"
+    title = "Fill-in-the-Blank Quiz"
+    temperature = 0.7
+    prompt_template = """
+    Generate exactly {count} high-quality fill-in-the-blank questions based **only** on the provided text.
+
+    **Strict Instructions:**
+    - question generated should be such that each question should strictly have a blank
+    - Use direct references from the text.
+    - Maintain high academic quality.
+    - Format the output as follows:
+    
+    **Example Output:**
+    Q1. The concept of _____ was introduced by [author/scientist] in [year]. | [correct answer]  
+    Q2. In physics, Newton's Second Law states that Force = Mass × _____. | [Acceleration]  
+    Q3. The capital of France is _____. | [Paris]  
+    
+    **Do NOT generate unrelated questions. Only use the given text.**
+    
+    **Text for Reference:**  
+    {context}
+
+    **Generate the Questions Below (Follow the Format Strictly):**
+    """
+    schema = array_schema(
+        {
+            "question": {"type": "string", "description": "contains exactly one _____ blank"},
+            "answer": {"type": "string", "description": "the word or phrase for the blank"},
+            "synonyms": {"type": "array", "items": {"type": "string"},
+                         "description": "other answers that are equally correct, if any"},
+        },
+        ["question", "answer"],
+    )
+    instructions = ("high-quality fill-in-the-blank questions, each with exactly one _____ blank and the "
+                    "missing word or phrase as the answer, using direct references from the text; list any "
+                    "equally correct alternative answers as synonyms")
+    # Answers are typed by students, so they are graded leniently
+    grader = default_grader
+
+    def line_parser(self, rejected=None, stats=None):
+        return FillBlankStreamParser(rejected, stats)
+
+    def repair(self, item):
+        question = text_field(item, "question")
+        answer = text_field(item, "answer")
+        if not question or not answer:
+            return None, False
+
+        repaired = False
+        unnumbered = strip_numbering(question)
+        if unnumbered != question:
+            question = unnumbered
+            repaired = True
+        if answer.startswith("[") and answer.endswith("]"):
+            answer = answer[1:-1].strip()
+            repaired = True
+        if "_" not in question:
+            # The model sometimes leaves the answer in place instead of blanking it out
+            blanked = re.sub(re.escape(answer), BLANK, question, count=1, flags=re.IGNORECASE)
+            if blanked == question:
+                return None, False
+            question = blanked
+            repaired = True
+        if not answer:
+            return None, False
+        fixed = {"question": question, "answer": answer}
+        synonyms = item.get("synonyms")
+        if isinstance(synonyms, list):
+            fixed["synonyms"] = [s.strip() for s in synonyms if isinstance(s, str) and s.strip()]
+        return fixed, repaired
+
+    def is_correct(self, question, answer):
+        return self.grader.is_correct(question, answer)
+
+    def grade_cohort(self, questions, submissions):
+        return self.grader.grade_cohort(questions, submissions)
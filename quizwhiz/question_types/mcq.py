@@ -0,0 +1,80 @@
+import random
+
+from quizwhiz.question_types.base import QuestionType, register
+from quizwhiz.structured import array_schema, text_field
+from quizwhiz.streaming import MCQStreamParser
+
+_LETTERS = "ABCD"
+
+
+@register
+class MultipleChoice(QuestionType):
+    name = "mcq"
+    title = "Quiz Questions"
+    temperature = 0.5
+    prompt_template = """
+    Based on the following text, generate {count} high-quality multiple-choice questions (MCQs).
+    Ensure each question has exactly **four options** and a **single correct answer**.
+    
+    **Format (strictly follow this format):**
+    
+    question: <question_text>
+    option: <option1>
+    option: <option2>
+    option: <option3>
+    option: <option4>
+    answer: <correct_option>
+    
+    **Context:**  
+    {context}
+    
+    **Questions:**  
+    """
+    schema = array_schema(
+        {
+            "question": {"type": "string"},
+            "options": {"type": "array", "items": {"type": "string"}, "minItems": 4, "maxItems": 4},
+            "answer": {"type": "string", "description": "must be one of options"},
+        },
+        ["question", "options", "answer"],
+    )
+    instructions = ("high-quality multiple-choice questions (MCQs), each with exactly four distinct options "
+                    "and a single correct answer copied verbatim from the options")
+
+    def line_parser(self, rejected=None, stats=None):
+        return MCQStreamParser(rejected, stats)
+
+    def repair(self, item):
+        question = text_field(item, "question")
+        answer = text_field(item, "answer")
+        raw_options = item.get("options")
+        if not question or not answer or not isinstance(raw_options, list):
+            return None, False
+
+        options = []
+        for option in raw_options:
+            if isinstance(option, (int, float)):
+                option = str(option)
+            option = option.strip() if isinstance(option, str) else None
+            if option and option.lower() not in (o.lower() for o in options):
+                options.append(option)
+        repaired = options != raw_options
+
+        # Answers given as a letter, or differing from their option only in case
+        by_lower = {o.lower(): o for o in options}
+        if answer not in options:
+            if answer.lower() in by_lower:
+                answer = by_lower[answer.lower()]
+            elif len(answer) == 1 and answer.upper() in _LETTERS[:len(options)]:
+                answer = options[_LETTERS.index(answer.upper())]
+            elif len(options) == 3:
+                options.append(answer)
+            repaired = True
+
+        if len(options) != 4 or answer not in options:
+            return None, False
+        random.shuffle(options)  # Shuffle answer order
+        return {"type": "mcq", "question": question, "options": options, "answer": answer}, repaired
+
+    def pdf_lines(self, question):
+        return [(20, f"- {option}") for option in question["options"]]
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import random
+import re
+
+from quizwhiz.cache import get_cache
+
+# Generated questions stay valid for a week, after which popular prompts are refreshed
+RESPONSE_TTL = 7 * 24 * 3600
+RESPONSE_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def get_response_cache():
+    return get_cache("responses", max_bytes=RESPONSE_CACHE_BYTES, ttl=RESPONSE_TTL)
+
+
+def normalize(text):
+    """Collapse whitespace so prompts differing only in layout share a cache entry."""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(*parts):
+    """Hash the given parts (strings are whitespace-normalized) into a stable cache key."""
+    normalized = [normalize(part) if isinstance(part, str) else part for part in parts]
+    return hashlib.sha256(json.dumps(normalized).encode("utf-8")).hexdigest()
+
+
+class CachedLLM:
+    """Wraps a bound LLM so identical prompts are answered from the response cache.
+
+    A rendered prompt already contains the prompt template, the context and the number of
+    questions, so the key is (model, temperature, normalized prompt).
+    """
+
+    def __init__(self, llm, cache=None):
+        self.llm = llm
+        self.settings = getattr(llm, "settings", {})
+        self.cache = cache if cache is not None else get_response_cache()
+
+    def _key(self, prompt):
+        return cache_key("response", self.settings.get("model"), self.settings.get("temperature"), prompt)
+
+    def stream_many(self, prompts):
+        """Like the wrapped stream_many; cached prompts arrive as a single piece of text."""
+        keys = [self._key(prompt) for prompt in prompts]
+        cached = self.cache.get_many(keys)
+        misses = []
+        for i, key in enumerate(keys):
+            if key in cached:
+                yield i, cached[key].decode("utf-8")
+                yield i, None
+            else:
+                misses.append(i)
+        if not misses:
+            return
+
+        parts = {i: [] for i in misses}
+        for local, delta in self.llm.stream_many([prompts[i] for i in misses]):
+            i = misses[local]
+            if delta is None:
+                text = "".join(parts.pop(i))
+                if text:
+                    self.cache.set(keys[i], text.encode("utf-8"))
+            else:
+                parts[i].append(delta)
+            yield i, delta
+
+
+def reshuffle(questions):
+    """Return copies of the questions with MCQ options shuffled again for the current user."""
+    shuffled = []
+    for question in questions:
+        question = dict(question)
+        if "options" in question:
+            question["options"] = random.sample(question["options"], len(question["options"]))
+        shuffled.append(question)
+    return shuffled
+
+
+def reuse_document_questions(kind, settings, text_chunks, num_questions, generate, cache=None):
+    """Yield a previously parsed question set for an identical document, or generate and store one.
+
+    The key covers the question type, model settings, every chunk of the selected pages and
+    num_questions. Cached sets come back with options re-shuffled; otherwise questions from
+    generate() are passed through as they arrive and stored once the set is complete.
+    """
+    cache = cache if cache is not None else get_response_cache()
+    key = cache_key("document", kind, settings.get("model"), settings.get("temperature"),
+                    text_chunks, num_questions)
+    cached = cache.get(key)
+    if cached is not None:
+        yield from reshuffle(json.loads(cached))
+        return
+
+    questions = []
+    for question in generate():
+        questions.append(question)
+        yield question
+    if questions:
+        cache.set(key, json.dumps(questions).encode("utf-8"))
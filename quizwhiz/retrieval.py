@@ -0,0 +1,183 @@
+"""Content-based choice of the chunks a quiz is generated from.
+
+Every chunk of a document is embedded once and the vectors are kept on disk as a
+memory-mapped NumPy array keyed by the chunks' content, so later quizzes on the same
+book reuse them. Embeddings come from a local sentence-transformers model when
+QUIZWHIZ_EMBEDDING_MODEL names one and the package is installed, and otherwise from
+hashed TF-IDF vectors.
+
+select_chunks ranks chunks by maximal marginal relevance (MMR): relevance is similarity
+to the document as a whole, which favours chunks about its main subject over tables of
+contents, indexes and reference lists, and each pick is penalised for resembling chunks
+already chosen. Picks stop at the token budget.
+"""
+import importlib.util
+import json
+import math
+import os
+import re
+import tempfile
+import zlib
+from collections import Counter
+
+from quizwhiz.cache import CACHE_DIR
+from quizwhiz.chunking import count_tokens
+from quizwhiz.metrics import metrics
+from quizwhiz.response_cache import cache_key
+
+INDEX_DIR = os.path.join(CACHE_DIR, "indexes")
+INDEX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Local sentence-transformers model, e.g. "all-MiniLM-L6-v2"; TF-IDF when unset or unavailable
+EMBEDDING_MODEL = os.getenv("QUIZWHIZ_EMBEDDING_MODEL")
+
+TFIDF_DIMENSIONS = 2048
+
+# Weight of relevance against novelty in MMR
+MMR_LAMBDA = 0.7
+
+# Context budget per requested question, and overall
+TOKENS_PER_QUESTION = 1000
+MAX_CONTEXT_TOKENS = 32000
+
+_WORD = re.compile(r"[a-z][a-z0-9]{2,}")
+_STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has him his how its may new now "
+    "see two way who did get let put say she too use that with have this will your from they been "
+    "were said each which their there what about would these other into more some than then them "
+    "also only such when where while very most over like just many much both between through".split()
+)
+
+
+def _chunk_text(chunk):
+    return getattr(chunk, "text", chunk)
+
+
+def _terms(text):
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def tfidf_vectors(texts, dimensions=TFIDF_DIMENSIONS):
+    """Sublinear TF-IDF vectors, hashed into a fixed number of signed dimensions and L2-normalized."""
+    import numpy as np
+
+    counts = [Counter(_terms(text)) for text in texts]
+    document_frequency = Counter(term for count in counts for term in count)
+    idf = {term: math.log((1 + len(texts)) / (1 + df)) + 1 for term, df in document_frequency.items()}
+    buckets = {term: zlib.crc32(term.encode()) for term in document_frequency}
+
+    vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+    for row, count in enumerate(counts):
+        for term, tf in count.items():
+            bucket = buckets[term]
+            sign = 1.0 if bucket & 0x80000000 else -1.0
+            vectors[row, bucket % dimensions] += sign * (1 + math.log(tf)) * idf[term]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def embedding_method():
+    """The configured local model if sentence-transformers is installed, else "tfidf"."""
+    if EMBEDDING_MODEL and importlib.util.find_spec("sentence_transformers") is not None:
+        return EMBEDDING_MODEL
+    return "tfidf"
+
+
+def embed(texts, method):
+    """Return a float32 array with one unit vector per text."""
+    if method == "tfidf":
+        return tfidf_vectors(texts)
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(method, device="cpu")
+    return model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype("float32")
+
+
+def _prune_indexes(keep):
+    """Remove the least recently used indexes (vectors and metadata) beyond INDEX_CACHE_BYTES."""
+    entries = {}
+    for name in os.listdir(INDEX_DIR):
+        key, extension = os.path.splitext(name)
+        if extension in (".npy", ".json"):
+            stat = os.stat(os.path.join(INDEX_DIR, name))
+            used, size = entries.get(key, (0.0, 0))
+            entries[key] = (max(used, stat.st_mtime) if extension == ".npy" else used, size + stat.st_size)
+    total = sum(size for _, size in entries.values())
+    for key, (_, size) in sorted(entries.items(), key=lambda entry: entry[1][0]):
+        if total <= INDEX_CACHE_BYTES:
+            break
+        if key != keep:
+            for extension in (".npy", ".json"):
+                try:
+                    os.remove(os.path.join(INDEX_DIR, key + extension))
+                except FileNotFoundError:
+                    pass  # Another process pruned it first
+            total -= size
+
+
+def load_index(text_chunks):
+    """Return the chunks' embedding matrix, memory-mapped from disk, building it on first use."""
+    import numpy as np
+
+    texts = [_chunk_text(chunk) for chunk in text_chunks]
+    method = embedding_method()
+    key = cache_key("index", method, TFIDF_DIMENSIONS, texts)
+    path = os.path.join(INDEX_DIR, f"{key}.npy")
+    if os.path.exists(path):
+        os.utime(path)  # Mark as recently used for eviction
+    else:
+        vectors = embed(texts, method)
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        descriptor, tmp_path = tempfile.mkstemp(dir=INDEX_DIR, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as out:
+            np.save(out, vectors)
+        os.replace(tmp_path, path)
+        with open(os.path.join(INDEX_DIR, f"{key}.json"), "w") as meta:
+            json.dump({"method": method, "chunks": len(texts), "dimensions": vectors.shape[1]}, meta)
+        _prune_indexes(keep=key)
+    return np.load(path, mmap_mode="r")
+
+
+def context_budget(num_questions):
+    return min(MAX_CONTEXT_TOKENS, max(1, num_questions) * TOKENS_PER_QUESTION)
+
+
+@metrics.timed("retrieve")
+def select_chunks(text_chunks, num_questions, token_budget=None, diversity=MMR_LAMBDA):
+    """Return the most informative, least redundant chunks that fit the token budget.
+
+    The budget defaults to TOKENS_PER_QUESTION per question, capped at MAX_CONTEXT_TOKENS.
+    Chunks come back in document order. When no chunk fits the budget, the most relevant
+    one is returned on its own.
+    """
+    import numpy as np
+
+    text_chunks = list(text_chunks)
+    if token_budget is None:
+        token_budget = context_budget(num_questions)
+    tokens = [getattr(chunk, "tokens", None) or count_tokens(_chunk_text(chunk)) for chunk in text_chunks]
+    if sum(tokens) <= token_budget:
+        return text_chunks
+
+    vectors = np.asarray(load_index(text_chunks))
+    centroid = vectors.mean(axis=0)
+    centroid /= max(float(np.linalg.norm(centroid)), 1e-12)
+    relevance = vectors @ centroid
+
+    chosen = []
+    closest = np.zeros(len(text_chunks), dtype=np.float32)
+    available = np.ones(len(text_chunks), dtype=bool)
+    used = 0
+    smallest = min(tokens)
+    while available.any() and token_budget - used >= smallest:
+        scores = np.where(available, diversity * relevance - (1 - diversity) * closest, -np.inf)
+        best = int(np.argmax(scores))
+        available[best] = False
+        if used + tokens[best] > token_budget:
+            continue  # Too big for what is left of the budget; a smaller chunk may still fit
+        chosen.append(best)
+        used += tokens[best]
+        closest = np.maximum(closest, vectors @ vectors[best])
+    if not chosen:
+        chosen = [int(np.argmax(relevance))]
+    return [text_chunks[i] for i in sorted(chosen)]
@@ -0,0 +1,317 @@
+"""Persistent store for documents, generated quizzes, their questions and quiz attempts.
+
+Everything lives in one SQLite database in WAL mode, so readers never wait for the
+writer. Connections come from a small pool that any thread may borrow from, and
+attempts are buffered and written in batches by a background thread.
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+# Persistent data, unlike CACHE_DIR, must survive clearing the caches
+DB_PATH = os.getenv("QUIZWHIZ_DB", "quizwhiz.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_hash TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    num_pages INTEGER,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quizzes (
+    id INTEGER PRIMARY KEY,
+    doc_hash TEXT REFERENCES documents (doc_hash),
+    kind TEXT NOT NULL,
+    start_page INTEGER,
+    end_page INTEGER,
+    num_questions INTEGER NOT NULL,
+    settings TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS questions (
+    quiz_id INTEGER NOT NULL REFERENCES quizzes (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (quiz_id, position)
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    quiz_id INTEGER NOT NULL REFERENCES quizzes (id) ON DELETE CASCADE,
+    user TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    answers TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pool_questions (
+    id INTEGER PRIMARY KEY,
+    pool_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    served INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quizzes_doc ON quizzes (doc_hash, kind, start_page, end_page, created);
+CREATE INDEX IF NOT EXISTS quizzes_kind ON quizzes (kind, created);
+CREATE INDEX IF NOT EXISTS attempts_quiz ON attempts (quiz_id, created);
+CREATE INDEX IF NOT EXISTS attempts_user ON attempts (user, created);
+CREATE INDEX IF NOT EXISTS pool_questions_key ON pool_questions (pool_key, served);
+"""
+
+Quiz = namedtuple("Quiz", "id doc_hash kind start_page end_page settings created questions")
+QuizSummary = namedtuple("QuizSummary", "id doc_hash name kind start_page end_page num_questions created")
+Attempt = namedtuple("Attempt", "quiz_id user score total answers created")
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _where(**filters):
+    """Build a WHERE clause and its parameters from the filters that are not None."""
+    filters = {column: value for column, value in filters.items() if value is not None}
+    if not filters:
+        return "", []
+    return "WHERE " + " AND ".join(f"{column} = ?" for column in filters), list(filters.values())
+
+
+class ConnectionPool:
+    """Hands out at most size SQLite connections; callers block while all are borrowed."""
+
+    def __init__(self, path, size=8):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return self._connect()
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for one transaction; commit on success, roll back on error."""
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class QuizStore:
+    """Documents, quizzes, questions and attempts in a pooled SQLite database."""
+
+    def __init__(self, path=DB_PATH, pool_size=8, batch_size=200, flush_interval=1.0):
+        self.pool = ConnectionPool(path, pool_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+        self._flusher = threading.Thread(target=self._flush_loop, name="quizwhiz-store", daemon=True)
+        self._flusher.start()
+
+    # Documents and quizzes
+
+    def save_document(self, doc_hash, name, num_pages=None):
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO documents VALUES (?, ?, ?, ?) ON CONFLICT (doc_hash) DO UPDATE"
+                " SET name = excluded.name, num_pages = COALESCE(excluded.num_pages, num_pages)",
+                (doc_hash, name, num_pages, time.time()),
+            )
+
+    def save_quiz(self, kind, questions, doc_hash=None, start_page=None, end_page=None, settings=None):
+        """Store a quiz and all its questions in one transaction and return the quiz id."""
+        with self.pool.connection() as conn:
+            quiz_id = conn.execute(
+                "INSERT INTO quizzes (doc_hash, kind, start_page, end_page, num_questions, settings, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_hash, kind, start_page, end_page, len(questions), json.dumps(settings or {}), time.time()),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO questions VALUES (?, ?, ?, ?, ?)",
+                [(quiz_id, position, question["question"], question["answer"], json.dumps(question))
+                 for position, question in enumerate(questions)],
+            )
+        return quiz_id
+
+    def load_quiz(self, quiz_id):
+        """Return the Quiz with its questions in their original order, or None."""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT id, doc_hash, kind, start_page, end_page, settings, created FROM quizzes WHERE id = ?",
+                (quiz_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            questions = [json.loads(data) for data, in conn.execute(
+                "SELECT data FROM questions WHERE quiz_id = ? ORDER BY position", (quiz_id,)
+            )]
+        return Quiz(*row[:5], json.loads(row[5]), row[6], questions)
+
+    def list_quizzes(self, kind=None, doc_hash=None, limit=50):
+        """Return QuizSummary rows, newest first."""
+        where, params = _where(**{"quizzes.kind": kind, "quizzes.doc_hash": doc_hash})
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT quizzes.id, quizzes.doc_hash, COALESCE(documents.name, ''), quizzes.kind,"
+                " quizzes.start_page, quizzes.end_page, quizzes.num_questions, quizzes.created"
+                f" FROM quizzes LEFT JOIN documents USING (doc_hash) {where}"
+                " ORDER BY quizzes.created DESC LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        return [QuizSummary(*row) for row in rows]
+
+    # Question pools
+
+    def add_pool_questions(self, pool_key, questions, served=0):
+        with self.pool.connection() as conn:
+            conn.executemany(
+                "INSERT INTO pool_questions (pool_key, data, served, created) VALUES (?, ?, ?, ?)",
+                [(pool_key, json.dumps(question), served, time.time()) for question in questions],
+            )
+
+    def pool_questions(self, pool_key):
+        with self.pool.connection() as conn:
+            return [json.loads(data) for data, in conn.execute(
+                "SELECT data FROM pool_questions WHERE pool_key = ?", (pool_key,)
+            )]
+
+    def pool_counts(self, pool_key):
+        """Return (total, unserved) question counts for a pool."""
+        with self.pool.connection() as conn:
+            total, unserved = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(served = 0), 0) FROM pool_questions WHERE pool_key = ?",
+                (pool_key,),
+            ).fetchone()
+        return total, unserved
+
+    def draw_pool_questions(self, pool_key, count):
+        """Take count questions, least served first, and mark them served; [] if the pool is smaller."""
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT id, data FROM pool_questions WHERE pool_key = ? ORDER BY served, RANDOM() LIMIT ?",
+                (pool_key, count),
+            ).fetchall()
+            if len(rows) < count:
+                return []
+            conn.executemany("UPDATE pool_questions SET served = served + 1 WHERE id = ?", [(i,) for i, _ in rows])
+        return [json.loads(data) for _, data in rows]
+
+    # Attempts
+
+    def record_attempt(self, quiz_id, user, score, total, answers):
+        """Queue an attempt; it is written with others in the next batch."""
+        with self._pending_lock:
+            self._pending.append((quiz_id, user, score, total, json.dumps(answers), time.time()))
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write every queued attempt now."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            with self.pool.connection() as conn:
+                conn.executemany(
+                    "INSERT INTO attempts (quiz_id, user, score, total, answers, created)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    pending,
+                )
+        except sqlite3.Error:
+            # Keep the batch for the next flush rather than losing attempts
+            with self._pending_lock:
+                self._pending[:0] = pending
+            raise
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass  # The batch was requeued and is retried on the next tick
+
+    def attempts(self, quiz_id=None, user=None, limit=100):
+        """Return Attempt rows for a quiz and/or user, newest first."""
+        self.flush()
+        where, params = _where(quiz_id=quiz_id, user=user)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT quiz_id, user, score, total, answers, created FROM attempts {where}"
+                " ORDER BY created DESC LIMIT ?",
+                params + [limit],
+            ).fetchall()
+        return [Attempt(*row[:4], json.loads(row[4]), row[5]) for row in rows]
+
+    def attempt_summary(self, quiz_id=None, user=None):
+        """Aggregate attempts in SQL: count, distinct users, mean and best score fraction."""
+        self.flush()
+        where, params = _where(quiz_id=quiz_id, user=user)
+        with self.pool.connection() as conn:
+            count, users, mean, best = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT user), AVG(CAST(score AS REAL) / total),"
+                f" MAX(CAST(score AS REAL) / total) FROM attempts {where}",
+                params,
+            ).fetchone()
+        return {"attempts": count, "users": users, "mean_score": mean or 0.0, "best_score": best or 0.0}
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+        self.pool.close()
+
+
+def get_store():
+    """Return the process-wide store at DB_PATH, flushed when the interpreter exits."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = QuizStore()
+            atexit.register(_store.close)
+        return _store
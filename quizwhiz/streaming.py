@@ -0,0 +1,204 @@
+import random
+import re
+import threading
+import time
+
+from quizwhiz.metrics import metrics
+
+# The model's own "Q1." / "2)" numbering restarts in every chunk's response
+QUESTION_NUMBER = re.compile(r"^Q?\d+[.)]\s*", re.IGNORECASE)
+
+
+def strip_numbering(question):
+    return QUESTION_NUMBER.sub("", question.strip(), count=1)
+
+
+class ParseStats:
+    """Counts parse outcomes; every instance also adds to the process-wide totals."""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.parsed = 0
+        self.repaired = 0
+        self.rejected = 0
+        self.rerequested = 0
+        self.duplicates = 0
+
+    def add(self, field, count=1):
+        setattr(self, field, getattr(self, field) + count)
+        if self.parent is not None:
+            self.parent.add(field, count)
+
+    @property
+    def success_rate(self):
+        total = self.parsed + self.repaired + self.rejected
+        return (self.parsed + self.repaired) / total if total else 1.0
+
+    def as_dict(self):
+        return {
+            "parsed": self.parsed,
+            "repaired": self.repaired,
+            "rejected": self.rejected,
+            "rerequested": self.rerequested,
+            "duplicates": self.duplicates,
+            "success_rate": self.success_rate,
+        }
+
+
+# Aggregate over every parser in this process
+parse_totals = ParseStats()
+
+
+class LineParser:
+    """Base class for incremental parsers fed raw model output piece by piece.
+
+    feed() and close() return the questions completed by that call; blocks that can never
+    form a valid question are collected in rejected and counted in invalid. Time spent
+    parsing is summed over the calls and recorded as one "parse" stage sample on close().
+    """
+
+    def __init__(self, rejected=None, stats=None):
+        self.rejected = rejected if rejected is not None else []
+        self.stats = stats if stats is not None else ParseStats(parse_totals)
+        self.invalid = 0
+        self.busy = 0.0
+        self._buffer = ""
+
+    def reject(self, text):
+        self.rejected.append(text)
+        self.invalid += 1
+        self.stats.add("rejected")
+
+    def accept(self, question, repaired=False):
+        self.stats.add("repaired" if repaired else "parsed")
+        return question
+
+    def feed(self, text):
+        started = time.perf_counter()
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        found = []
+        for line in lines:
+            found.extend(self.parse_line(line))
+        self.busy += time.perf_counter() - started
+        return found
+
+    def close(self):
+        started = time.perf_counter()
+        found = []
+        if self._buffer:
+            found.extend(self.parse_line(self._buffer))
+            self._buffer = ""
+        found.extend(self.finish())
+        self.busy += time.perf_counter() - started
+        self.record_busy()
+        return found
+
+    def record_busy(self):
+        metrics.observe("quizwhiz_stage_seconds", self.busy, stage="parse")
+
+    def parse_line(self, line):
+        raise NotImplementedError
+
+    def finish(self):
+        return []
+
+
+class MCQStreamParser(LineParser):
+    """Emits an MCQ as soon as its block has a question, four unique options and an answer."""
+
+    def __init__(self, rejected=None, stats=None):
+        super().__init__(rejected, stats)
+        self._reset()
+
+    def _reset(self):
+        self._lines = []
+        self._question = None
+        self._options = []
+        self._answer = None
+        self._emitted = False
+
+    def _finish_block(self):
+        if self._lines and not self._emitted:
+            self.reject("\n".join(self._lines))
+        self._reset()
+
+    def parse_line(self, line):
+        line = line.strip()
+        if not line:
+            self._finish_block()
+            return []
+        if line.startswith("question:") and self._question is not None:
+            self._finish_block()
+
+        self._lines.append(line)
+        if line.startswith("question:") and self._question is None:
+            self._question = line.replace("question:", "").strip()
+        elif line.startswith("option:"):
+            option_text = line.replace("option:", "").strip()
+            if option_text not in self._options:
+                self._options.append(option_text)
+        elif line.startswith("answer:") and self._answer is None:
+            self._answer = line.replace("answer:", "").strip()
+
+        if self._emitted or not (self._question and self._answer and len(self._options) == 4):
+            return []
+        self._emitted = True
+        options = list(self._options)
+        random.shuffle(options)  # Shuffle answer order
+        return [self.accept({"type": "mcq", "question": self._question, "options": options, "answer": self._answer})]
+
+    def finish(self):
+        self._finish_block()
+        return []
+
+
+class FillBlankStreamParser(LineParser):
+    """Emits a fill-in-the-blank question for every complete "question | answer" line."""
+
+    def parse_line(self, line):
+        if not line.strip():
+            return []
+        parts = line.split("|")
+        if len(parts) != 2:
+            self.reject(line)
+            return []
+        # The prompt's own example wraps answers in brackets: "... | [Paris]"
+        answer = parts[1].strip()
+        if answer.startswith("[") and answer.endswith("]"):
+            answer = answer[1:-1].strip()
+        return [self.accept({"question": strip_numbering(parts[0]), "answer": answer})]
+
+
+class GenerationJob:
+    """Drains a question iterator on a background thread so the UI can show questions early.
+
+    questions grows as the iterator yields; the Streamlit script thread can render it, or
+    start the quiz, while generation is still running.
+    """
+
+    def __init__(self, questions_iter):
+        self.questions = []
+        self.done = False
+        self.error = None
+        self._changed = threading.Condition()
+        threading.Thread(target=self._run, args=(questions_iter,), name="quizwhiz-generation", daemon=True).start()
+
+    def _run(self, questions_iter):
+        try:
+            for question in questions_iter:
+                with self._changed:
+                    self.questions.append(question)
+                    self._changed.notify_all()
+        except Exception as exc:
+            self.error = exc
+        finally:
+            with self._changed:
+                self.done = True
+                self._changed.notify_all()
+
+    def wait_for_more(self, seen, timeout=None):
+        """Block until more than seen questions exist or the job is done; return the count."""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.questions) > seen or self.done, timeout)
+            return len(self.questions)
@@ -0,0 +1,103 @@
+import json
+import time
+
+from quizwhiz.streaming import LineParser
+
+JSON_PROMPT_TEMPLATE = """
+    Based **only** on the following text, generate exactly {count} {instructions}.
+
+    Respond with a single JSON array and nothing else. It must validate against this JSON schema:
+    {schema}
+
+    **Context:**
+    {context}
+
+    **JSON:**
+    """
+
+
+def array_schema(properties, required):
+    """Schema for a JSON array of question objects with the given properties."""
+    return {
+        "type": "array",
+        "items": {"type": "object", "properties": properties, "required": required},
+    }
+
+
+def build_json_prompt(schema, instructions, context, count):
+    """Render the structured-output prompt asking for count questions matching schema."""
+    return JSON_PROMPT_TEMPLATE.format(
+        count=count, instructions=instructions, schema=json.dumps(schema), context=context
+    )
+
+
+def text_field(item, name):
+    """Return item[name] stripped if it is a string, otherwise None."""
+    value = item.get(name)
+    return value.strip() if isinstance(value, str) else None
+
+
+class JSONStreamParser(LineParser):
+    """Single-pass validator for a streamed JSON array of question objects.
+
+    Objects are cut out of the stream as soon as their closing brace arrives, decoded and
+    passed to repair(item), which returns (question, repaired) or (None, False) when the
+    item cannot be made to match the schema. Surrounding text such as markdown fences or
+    the enclosing array brackets is ignored.
+    """
+
+    def __init__(self, repair, rejected=None, stats=None):
+        super().__init__(rejected, stats)
+        self.repair = repair
+        self._object = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text):
+        started = time.perf_counter()
+        found = []
+        for char in text:
+            if self._depth == 0:
+                if char == "{":
+                    self._object = [char]
+                    self._depth = 1
+                continue
+
+            self._object.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    found.extend(self._finish_object("".join(self._object)))
+        self.busy += time.perf_counter() - started
+        return found
+
+    def _finish_object(self, raw):
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            self.reject(raw)
+            return []
+        question, repaired = self.repair(item) if isinstance(item, dict) else (None, False)
+        if question is None:
+            self.reject(raw)
+            return []
+        return [self.accept(question, repaired)]
+
+    def close(self):
+        if self._depth:
+            self.reject("".join(self._object))
+            self._depth = 0
+        self.record_busy()
+        return []
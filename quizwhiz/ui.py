@@ -0,0 +1,245 @@
+"""Streamlit helpers shared by the pages; the rest of the package never imports Streamlit."""
+import os
+
+import streamlit as st
+
+from quizwhiz.config import configure
+from quizwhiz.extraction import documents_hash
+from quizwhiz.ingestion import Source, ingest
+from quizwhiz.llm import get_client
+from quizwhiz.metrics import counter_total, stage_summary, start_from_env
+from quizwhiz.store import get_store
+
+# Answering a question reruns only that question; set QUIZWHIZ_FRAGMENTS=0 to rerun the
+# whole page instead, e.g. to compare the two with benchmarks/bench_sessions.py
+FRAGMENTS = os.getenv("QUIZWHIZ_FRAGMENTS", "1") != "0"
+
+
+@st.cache_resource
+def init_resources():
+    """Configure the environment and create the shared LLM client once per server process.
+
+    Also starts the metrics endpoint and profiler when they are enabled (see quizwhiz.metrics).
+    """
+    configure()
+    start_from_env()
+    return get_client()
+
+
+def show_generation_progress(job, num_questions, label="Q"):
+    """Render questions as the background job produces them, until generation finishes."""
+    progress = st.progress(0.0, text="Generating questions...")
+    shown = 0
+    while not job.done or shown < len(job.questions):
+        count = job.wait_for_more(shown, timeout=0.5)
+        for question in job.questions[shown:count]:
+            shown += 1
+            st.write(f"**{label}{shown}.** {question['question']}")
+        progress.progress(min(1.0, shown / num_questions), text=f"{shown}/{num_questions} questions ready")
+    progress.empty()
+
+
+@st.fragment(run_every=2)
+def watch_generation(job, shown, message="{shown} questions ready, more are still being generated..."):
+    """Rerun the page whenever the running job has produced new questions."""
+    if job.done or len(job.questions) > shown:
+        st.rerun()
+    st.info(message.format(shown=shown))
+
+
+def show_parse_report(stats, rejected):
+    """Summarize parse outcomes, with the skipped items tucked into an expander."""
+    st.caption(
+        f"Parse success rate: {stats.success_rate:.0%} · repaired: {stats.repaired} · "
+        f"re-requested: {stats.rerequested} · near-duplicates dropped: {stats.duplicates}"
+    )
+    if rejected:
+        with st.expander(f"Skipped {len(rejected)} invalid items"):
+            for item in rejected:
+                st.code(item)
+
+
+def page_ranges(pdf_docs, start_page, end_page):
+    """One ingestion Source per upload; with several files, each range can be set separately."""
+    if len(pdf_docs) < 2:
+        return [Source(pdf, start_page, end_page, pdf.name) for pdf in pdf_docs]
+    sources = []
+    with st.sidebar.expander("Page range per file"):
+        for i, pdf in enumerate(pdf_docs):
+            first, last = st.columns(2)
+            sources.append(Source(
+                pdf,
+                first.number_input(f"{pdf.name} from", min_value=1, value=start_page, key=f"range_{i}_start"),
+                last.number_input(f"to (file {i + 1})", min_value=1, value=end_page, key=f"range_{i}_end"),
+                pdf.name,
+            ))
+    return sources
+
+
+def ingest_with_progress(sources):
+    """Extract and chunk the sources concurrently, with a progress bar per document."""
+    bars = {}
+
+    def on_progress(progress):
+        if progress.index not in bars:
+            bars[progress.index] = st.progress(0.0)
+        state = "chunked" if progress.done else f"{progress.pages_done}/{progress.pages_total} pages"
+        bars[progress.index].progress(progress.pages_done / max(1, progress.pages_total),
+                                      text=f"{progress.name}: {state}")
+
+    text_chunks = ingest(sources, on_progress)
+    for bar in bars.values():
+        bar.empty()
+    return text_chunks
+
+
+def current_user():
+    """Name the attempts of this browser session are recorded under."""
+    return st.sidebar.text_input("Your name:", value="anonymous", key="quiz_user").strip() or "anonymous"
+
+
+def remember_source(kind, sources, settings):
+    """Record the uploaded documents so the quiz about to be generated can be saved with them.
+
+    The quiz spans the lowest to the highest page requested; with several files, the range
+    of each is kept in its settings.
+    """
+    pdf_docs = [source.pdf for source in sources]
+    doc_hash = documents_hash(pdf_docs)
+    get_store().save_document(doc_hash, ", ".join(getattr(pdf, "name", "document") for pdf in pdf_docs))
+    if len(sources) > 1:
+        settings = dict(settings, ranges=[
+            {"name": source.name, "start_page": source.start_page, "end_page": source.end_page}
+            for source in sources
+        ])
+    st.session_state.quiz_id = None
+    st.session_state.quiz_snapshot = None
+    st.session_state.quiz_source = dict(kind=kind, doc_hash=doc_hash,
+                                        start_page=min(source.start_page for source in sources),
+                                        end_page=max(source.end_page for source in sources),
+                                        settings=settings)
+
+
+def persist_quiz():
+    """Save the generated quiz once its job has finished; return its id, or None until then."""
+    job = st.session_state.get("generation_job")
+    if st.session_state.get("quiz_id") is None and job is not None and job.done and job.questions:
+        source = dict(st.session_state.quiz_source)
+        st.session_state.quiz_id = get_store().save_quiz(source.pop("kind"), list(job.questions), **source)
+    return st.session_state.get("quiz_id")
+
+
+def saved_quiz_picker(kind):
+    """Sidebar list of saved quizzes of this kind; loading one replaces the current quiz."""
+    quizzes = get_store().list_quizzes(kind=kind)
+    if not quizzes:
+        return
+    labels = {
+        quiz.id: f"#{quiz.id} · {quiz.name or 'untitled'} · p{quiz.start_page}-{quiz.end_page} · "
+                 f"{quiz.num_questions} questions"
+        for quiz in quizzes
+    }
+    quiz_id = st.sidebar.selectbox("Saved quizzes:", list(labels), format_func=labels.get)
+    if st.sidebar.button("Load Quiz"):
+        quiz = get_store().load_quiz(quiz_id)
+        st.session_state.generation_job = None
+        st.session_state.questions_json = quiz.questions
+        st.session_state.quiz_id = quiz.id
+        st.session_state.quiz_submitted = False
+        st.rerun()
+
+
+def question_fragment(render):
+    """Decorate a function drawing one question so that its widgets rerun only that function.
+
+    Widget values are read back from session state with submitted_answers, since a
+    fragment rerun does not return anything to the page.
+    """
+    return st.fragment(render) if FRAGMENTS else render
+
+
+def submitted_answers(count):
+    """The answers in the question widgets keyed "q0", "q1", ..., keyed by question index."""
+    return {i: st.session_state.get(f"q{i}") for i in range(count)}
+
+
+def grade_submission(question_type, questions, answers):
+    """Return question_type.score(questions, answers), graded once per submission.
+
+    The result is kept in session state, so reruns showing the same results reuse it.
+    """
+    key = (question_type.name, tuple(question["question"] for question in questions),
+           tuple(answers.get(i) for i in range(len(questions))))
+    graded = st.session_state.get("graded_submission")
+    if graded is None or graded[0] != key:
+        graded = st.session_state.graded_submission = (key, question_type.score(questions, answers))
+    return graded[1]
+
+
+def snapshot_quiz(count):
+    """Save the first count questions of a quiz still being generated; return the saved id.
+
+    Attempts submitted before generation ends are stored against the questions they
+    answered. The complete quiz is still saved by persist_quiz once the job is done.
+    """
+    if st.session_state.get("quiz_source") is None:
+        return None
+    snapshot = st.session_state.get("quiz_snapshot")
+    if snapshot is None or snapshot[0] != count:
+        source = dict(st.session_state.quiz_source)
+        questions = list(st.session_state.questions_json)[:count]
+        quiz_id = get_store().save_quiz(source.pop("kind"), questions, **source)
+        snapshot = st.session_state.quiz_snapshot = (count, quiz_id)
+    return snapshot[1]
+
+
+def record_attempt(user, answers, score, total):
+    """Store a submitted attempt against the current quiz, or a snapshot of it during generation."""
+    quiz_id = st.session_state.attempt_quiz_id = persist_quiz() or snapshot_quiz(total)
+    if quiz_id is not None:
+        get_store().record_attempt(quiz_id, user, score, total, [answers.get(i) for i in range(total)])
+
+
+def show_attempt_summary(user):
+    quiz_id = persist_quiz() or st.session_state.get("attempt_quiz_id")
+    if quiz_id is None:
+        return
+    summary = get_store().attempt_summary(quiz_id=quiz_id)
+    mine = get_store().attempt_summary(quiz_id=quiz_id, user=user)
+    if summary["attempts"]:
+        st.caption(
+            f"{summary['attempts']} attempts by {summary['users']} people · average {summary['mean_score']:.0%}"
+            f" · your best {mine['best_score']:.0%}"
+        )
+
+
+def show_diagnostics():
+    """Sidebar panel with stage timings, token use, cache hit rates and parse drops.
+
+    Only shown when QUIZWHIZ_DIAGNOSTICS is set.
+    """
+    if not os.getenv("QUIZWHIZ_DIAGNOSTICS"):
+        return
+    from quizwhiz.cache import _caches
+    from quizwhiz.profiling import get_profiler
+    from quizwhiz.streaming import parse_totals
+
+    with st.sidebar.expander("Diagnostics"):
+        rows = stage_summary()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        st.caption(
+            f"Model calls: {counter_total('quizwhiz_llm_calls_total')} · "
+            f"tokens in {counter_total('quizwhiz_llm_prompt_tokens_total'):,} / "
+            f"out {counter_total('quizwhiz_llm_completion_tokens_total'):,} · "
+            f"retries {counter_total('quizwhiz_llm_retries_total')}"
+        )
+        st.caption(" · ".join(f"{name} cache {cache.stats()['hit_rate']:.0%} hits"
+                              for name, cache in sorted(_caches.items())) or "No cache lookups yet")
+        st.caption(
+            f"Parsed {parse_totals.parsed} · repaired {parse_totals.repaired} · rejected {parse_totals.rejected}"
+            f" · duplicates {parse_totals.duplicates}"
+        )
+        profiler = get_profiler()
+        if profiler is not None:
+            st.caption("Hottest functions: " + ", ".join(f"{name} {share:.0%}" for name, share in profiler.top(5)))
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep caches and the quiz database of test runs out of the working tree
+_state = tempfile.mkdtemp(prefix="quizwhiz-tests-")
+os.environ.setdefault("QUIZWHIZ_CACHE_DIR", os.path.join(_state, "cache"))
+os.environ.setdefault("QUIZWHIZ_DB", os.path.join(_state, "quizwhiz.sqlite"))
+os.environ.setdefault("QUIZWHIZ_LLM_BACKEND", "stub")
@@ -0,0 +1,88 @@
+import random
+import re
+
+import pytest
+
+from quizwhiz.chunking import PAGE_SEPARATOR, chunk_bounds, chunk_document, count_tokens
+
+
+def make_pages(num_pages, seed=0):
+    rng = random.Random(seed)
+    words = ["cell", "energy", "membrane", "protein", "enzyme", "glucose", "nucleus", "transport", "signal"]
+    pages = []
+    for number in range(1, num_pages + 1):
+        lines = [f"Chapter {number}"] if number % 3 == 1 else []
+        for _ in range(rng.randint(3, 8)):
+            paragraph = " ".join(
+                " ".join(rng.choice(words) for _ in range(rng.randint(5, 20))).capitalize() + "."
+                for _ in range(rng.randint(1, 6))
+            )
+            lines += [paragraph, ""]
+        pages.append((number, "\n".join(lines)))
+    return pages
+
+
+def layout(pages):
+    document = PAGE_SEPARATOR.join(text for _, text in pages)
+    starts, offset = [], 0
+    for _, text in pages:
+        starts.append(offset)
+        offset += len(text) + len(PAGE_SEPARATOR)
+    return document, starts
+
+
+@pytest.mark.parametrize("max_tokens, overlap", [(1000, 100), (200, 20), (60, 0)])
+def test_chunks_fit_the_budget_and_cover_the_document(max_tokens, overlap):
+    document, starts = layout(make_pages(12))
+    spans = chunk_bounds(document, starts, max_tokens, overlap)
+    assert spans
+    covered = bytearray(len(document))
+    previous_start = -1
+    for start, end, tokens in spans:
+        assert start > previous_start  # In document order
+        previous_start = start
+        assert count_tokens(document[start:end]) <= max_tokens
+        assert tokens == count_tokens(document[start:end])
+        covered[start:end] = b"\1" * (end - start)
+    # Every word of the document is in some chunk
+    for match in re.finditer(r"\S+", document):
+        assert all(covered[match.start():match.end()]), match.group()
+
+
+def test_oversized_paragraphs_are_split_with_overlap():
+    sentence = "Enzymes lower the activation energy of reactions in the cell. "
+    document = sentence * 200
+    spans = chunk_bounds(document, [0], max_tokens=100, overlap_tokens=20)
+    assert len(spans) > 1
+    for (_, end, _), (start, _, _) in zip(spans, spans[1:]):
+        assert start < end  # Consecutive pieces of a split block share some text
+    assert all(tokens <= 100 for _, _, tokens in spans)
+
+
+def test_chunks_close_before_headings_once_well_filled():
+    paragraph = "Glucose is broken down in the cytoplasm and the mitochondria to release energy. " * 8
+    pages = [(number, f"Chapter {number}\n{paragraph}\n\n{paragraph}\n\n{paragraph}") for number in range(1, 7)]
+    chunks = chunk_document(None, pages, max_tokens=600, overlap_tokens=0)
+    assert len(chunks) == 6
+    assert [chunk.text.split("\n")[0] for chunk in chunks] == [f"Chapter {n}" for n in range(1, 7)]
+
+
+def test_chunk_pages_and_cache():
+    pages = make_pages(6)
+    chunks = chunk_document("doc-under-test", pages, max_tokens=300)
+    again = chunk_document("doc-under-test", pages, max_tokens=300)
+    assert chunks == again
+    assert chunks[0].first_page == 1 and chunks[-1].last_page == 6
+    for chunk in chunks:
+        assert chunk.first_page <= chunk.last_page
+
+
+def test_cached_bounds_follow_the_page_text():
+    # A scanned document first read without OCR must not keep its empty chunking
+    assert chunk_document("scan-under-test", [(1, ""), (2, "")]) == []
+    pages = make_pages(2)
+    chunks = chunk_document("scan-under-test", pages)
+    assert chunks
+    fresh = chunk_document(None, pages)
+    assert [(c.text, c.first_page, c.last_page) for c in chunks] == \
+        [(c.text, c.first_page, c.last_page) for c in fresh]
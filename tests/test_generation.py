@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from quizwhiz.fake_llm import FakeLLM
+from quizwhiz.generation import plan_chunks, stream_generate
+from quizwhiz.question_types import get_question_type
+from quizwhiz.streaming import ParseStats
+
+
+def word(rng):
+    return "".join(rng.choice("bcdfglmnprstv") + rng.choice("aeiou") for _ in range(rng.randint(2, 4)))
+
+
+def make_chunks(count, sentences=12, seed=0):
+    """Chunks of distinct made-up sentences; region<chunk>x marks which chunk a prompt is about."""
+    rng = random.Random(seed)
+    return [
+        " ".join(f"The {word(rng)} {word(rng)}s every {word(rng)} {word(rng)} in region{chunk}x{i}."
+                 for i in range(sentences))
+        for chunk in range(count)
+    ]
+
+
+class StreamingFake:
+    """FakeLLM behind the stream_many interface, cutting every response into small deltas."""
+
+    def __init__(self, broken=()):
+        self.llm = FakeLLM()
+        self.broken = set(broken)  # Chunk prompts answered with garbage the first time
+        self.calls = []
+
+    def stream_many(self, prompts):
+        self.calls.append(list(prompts))
+        for index, prompt in enumerate(prompts):
+            text = self.llm(prompt)
+            marker = next((chunk for chunk in self.broken if f"region{chunk}x" in prompt), None)
+            if marker is not None:
+                self.broken.discard(marker)
+                text = "Sorry, I cannot help with that.\n" + text.splitlines()[0][:20]
+            for start in range(0, len(text), 7):
+                yield index, text[start:start + 7]
+            yield index, None
+
+
+def generate(chunks, kind, num_questions, llm, structured=False, stats=None):
+    question_type = get_question_type(kind)
+    return list(stream_generate(
+        chunks, num_questions,
+        lambda context, count: question_type.build_prompt(context, count, structured),
+        lambda: question_type.new_parser(stats=stats, structured=structured),
+        llm, stats,
+    ))
+
+
+def test_plan_samples_evenly_when_questions_are_scarce():
+    assert plan_chunks(["a"] * 10, 5) == [(0, 1), (2, 1), (4, 1), (6, 1), (8, 1)]
+
+
+def test_plan_splits_by_size_and_skips_blank_chunks():
+    chunks = ["x" * 300, "   ", "x" * 100, "x" * 200]
+    plan = plan_chunks(chunks, 12)
+    assert sum(count for _, count in plan) == 12
+    assert dict(plan) == {0: 6, 2: 2, 3: 4}
+
+
+def test_plan_of_nothing_is_empty():
+    assert plan_chunks([], 5) == []
+    assert plan_chunks(["text"], 0) == []
+
+
+@pytest.mark.parametrize("kind", ["mcq", "fill_in_blank"])
+@pytest.mark.parametrize("structured", [False, True])
+def test_stream_generate_delivers_the_requested_number(kind, structured):
+    chunks = make_chunks(6)
+    questions = generate(chunks, kind, 8, StreamingFake(), structured)
+    assert len(questions) == 8
+    assert len({question["question"] for question in questions}) == 8
+    assert {question["chunk"] for question in questions} <= set(range(len(chunks)))
+    for question in questions:
+        assert question["answer"]
+        if kind == "mcq":
+            assert len(question["options"]) == 4 and question["answer"] in question["options"]
+        else:
+            assert "_____" in question["question"]
+
+
+def test_stream_generate_covers_every_chunk_when_questions_are_plentiful():
+    chunks = make_chunks(4)
+    questions = generate(chunks, "fill_in_blank", 8, StreamingFake())
+    assert {question["chunk"] for question in questions} == set(range(4))
+
+
+def test_invalid_output_is_requested_again():
+    chunks = make_chunks(3)
+    llm = StreamingFake(broken=[1])
+    stats = ParseStats()
+    questions = generate(chunks, "fill_in_blank", 6, llm, stats=stats)
+    assert len(questions) == 6
+    assert len(llm.calls) == 2 and len(llm.calls[1]) == 1
+    assert stats.rejected and stats.rerequested
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from quizwhiz.grading import Grader, edit_distances, normalize_answer
+
+
+def reference_distance(a, b, transpositions=False):
+    """Textbook Levenshtein (or optimal string alignment) distance, one cell at a time."""
+    rows = [[i + j if not i * j else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            rows[i][j] = min(rows[i - 1][j] + 1, rows[i][j - 1] + 1, rows[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if transpositions and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                rows[i][j] = min(rows[i][j], rows[i - 2][j - 2] + 1)
+    return rows[-1][-1]
+
+
+@pytest.mark.parametrize("transpositions", [False, True])
+def test_edit_distances_match_reference(transpositions):
+    rng = random.Random(7)
+    for _ in range(50):
+        reference = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 9)))
+        candidates = ["".join(rng.choice("abcd") for _ in range(rng.randint(0, 9))) for _ in range(20)]
+        candidates += ["", reference, reference[::-1]]
+        distances = edit_distances(reference, candidates, transpositions)
+        assert list(distances) == [reference_distance(reference, c, transpositions) for c in candidates]
+
+
+def test_transposition_counts_as_one_edit():
+    assert list(edit_distances("ocean", ["ocaen", "ocean"], transpositions=True)) == [1, 0]
+    assert list(edit_distances("ocean", ["ocaen"])) == [2]
+
+
+@pytest.mark.parametrize("reference, answer", [
+    ("Paris", "[paris]"),
+    ("Paris", "Pariss"),
+    ("The Eiffel Tower", "eiffel-tower!"),
+    ("mitochondria", "mitochondira"),
+    ("evaporation", "evaporaton"),
+    ("photosynthesis", "photosynthsis"),
+    ("the Pacific Ocean", "Pacfic Ocaen"),
+])
+def test_accepts_typos_and_formatting(reference, answer):
+    assert Grader().is_correct({"answer": reference}, answer)
+
+
+@pytest.mark.parametrize("reference, answer", [
+    ("exothermic", "endothermic"),
+    ("hypertonic", "hypotonic"),
+    ("hypertension", "hypotension"),
+    ("anabolism", "catabolism"),
+    ("afferent", "efferent"),
+    ("photosynthesis", "fotosynthesis"),
+    ("1789", "1798"),
+    ("ATP", "ADP"),
+])
+def test_rejects_opposites_and_near_misses(reference, answer):
+    assert not Grader().is_correct({"answer": reference}, answer)
+    assert not Grader().is_correct({"answer": answer}, reference)
+
+
+def test_synonyms_are_accepted():
+    question = {"answer": "vitamin C", "synonyms": ["ascorbic acid"]}
+    assert Grader().is_correct(question, "Ascorbic acid")
+    assert normalize_answer("The moon") == "moon"
+
+
+def test_grade_cohort_matches_is_correct():
+    grader = Grader()
+    questions = [{"answer": "hypertonic"}, {"answer": "Marie Curie"}]
+    submissions = [{0: "hypotonic", 1: "marie curie"}, ["hypertonnic", "Mary Curie"], {1: None}]
+    graded = grader.grade_cohort(questions, submissions)
+    for row, submission in enumerate(submissions):
+        for index, question in enumerate(questions):
+            answer = submission.get(index) if isinstance(submission, dict) else submission[index]
+            assert graded[row, index] == grader.is_correct(question, answer)
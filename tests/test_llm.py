@@ -0,0 +1,32 @@
+from quizwhiz.llm import LLMClient, Usage, estimate_tokens
+
+
+class ReportingBackend:
+    def __init__(self, model, temperature):
+        pass
+
+    async def stream(self, prompt):
+        yield "Hello, "
+        yield "world"
+        yield Usage(11, 7)
+
+
+class SilentBackend(ReportingBackend):
+    async def stream(self, prompt):
+        yield "Hello, world"
+
+
+def test_stream_records_reported_usage():
+    client = LLMClient(ReportingBackend)
+    deltas = [delta for _, delta in client.stream_many(["prompt"]) if delta is not None]
+    assert "".join(deltas) == "Hello, world"
+    record = client.records[-1]
+    assert (record.prompt_tokens, record.completion_tokens) == (11, 7)
+
+
+def test_stream_estimates_missing_usage():
+    client = LLMClient(SilentBackend)
+    list(client.stream_many(["a longer prompt text"]))
+    record = client.records[-1]
+    assert record.prompt_tokens == estimate_tokens("a longer prompt text")
+    assert record.completion_tokens == estimate_tokens("Hello, world")
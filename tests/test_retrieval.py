@@ -0,0 +1,14 @@
+from quizwhiz.retrieval import select_chunks
+
+
+def test_keeps_most_relevant_chunk_when_none_fits_the_budget():
+    chunks = ["alpha beta gamma " * 1200, "delta epsilon " * 1500]
+    assert len(select_chunks(chunks, 1)) == 1
+
+
+def test_selection_respects_budget_and_document_order():
+    chunks = [f"Topic {i}: photosynthesis converts sunlight chlorophyll energy glucose. " * 40 for i in range(12)]
+    chunks[3] = "Index: a, b, c, 1, 2, 3, see also, page numbers " * 40
+    chosen = select_chunks(chunks, 2, token_budget=1500)
+    assert chosen and chunks[3] not in chosen
+    assert chosen == [chunk for chunk in chunks if chunk in chosen]
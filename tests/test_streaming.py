@@ -0,0 +1,107 @@
+from quizwhiz.question_types import get_question_type
+from quizwhiz.streaming import FillBlankStreamParser, MCQStreamParser
+from quizwhiz.structured import JSONStreamParser
+
+
+def test_fill_blank_parser_strips_model_numbering():
+    parser = FillBlankStreamParser()
+    questions = parser.feed("Q1. The capital of France is _____. | [Paris]\n2) Water boils at _____ C. | 100\n")
+    questions += parser.close()
+    assert [q["question"] for q in questions] == ["The capital of France is _____.", "Water boils at _____ C."]
+    assert [q["answer"] for q in questions] == ["Paris", "100"]
+
+
+def test_fill_blank_repair_strips_numbering():
+    fixed, repaired = get_question_type("fill_in_blank").repair({"question": "Q12. _____ is red.", "answer": "Mars"})
+    assert fixed["question"] == "_____ is red."
+    assert repaired
+
+
+def feed_in_pieces(parser, text, size):
+    found = []
+    for start in range(0, len(text), size):
+        found += parser.feed(text[start:start + size])
+    return found + parser.close()
+
+
+MCQ_TEXT = """question: Which gas do plants absorb?
+option: Oxygen
+option: Carbon dioxide
+option: Nitrogen
+option: Helium
+answer: Carbon dioxide
+
+question: Which organelle makes ATP?
+option: Nucleus
+option: Nucleus
+option: Ribosome
+option: Mitochondrion
+answer: Mitochondrion
+
+question: What is H2O?
+option: Water
+option: Salt
+option: Sugar
+option: Air
+"""
+
+
+def test_mcq_parser_emits_complete_blocks_and_rejects_the_rest():
+    for size in (1, 5, 1000):
+        rejected = []
+        questions = feed_in_pieces(MCQStreamParser(rejected), MCQ_TEXT, size)
+        assert [q["question"] for q in questions] == ["Which gas do plants absorb?"]
+        assert sorted(questions[0]["options"]) == ["Carbon dioxide", "Helium", "Nitrogen", "Oxygen"]
+        assert questions[0]["answer"] == "Carbon dioxide"
+        # A duplicated option leaves only three, and the last block has no answer
+        assert len(rejected) == 2
+
+
+def test_mcq_parser_emits_as_soon_as_the_block_is_complete():
+    parser = MCQStreamParser()
+    head = "question: Q?\noption: a\noption: b\noption: c\noption: d\n"
+    assert parser.feed(head) == []
+    assert len(parser.feed("answer: a\n")) == 1
+    assert parser.feed("\n") == [] and parser.close() == []
+    assert parser.invalid == 0
+
+
+def test_mcq_parser_starts_a_new_block_at_each_question():
+    parser = MCQStreamParser()
+    text = "question: First?\noption: a\nquestion: Second?\noption: w\noption: x\noption: y\noption: z\nanswer: w\n"
+    questions = parser.feed(text) + parser.close()
+    assert [q["question"] for q in questions] == ["Second?"]
+    assert parser.invalid == 1
+
+
+def mcq_repair(item):
+    return get_question_type("mcq").repair(item)
+
+
+JSON_TEXT = """Here you go:
+```json
+[
+  {"question": "Which {brace} is \\"quoted\\"?", "options": ["a}", "b{", "c", "d"], "answer": "a}"},
+  {"question": "Nested", "options": ["w", "x", "y", "z"], "answer": "w", "meta": {"source": {"page": 3}}},
+  {"question": "Broken", "options": ["w", "x"], "answer": },
+  {"question": "Too few options", "options": ["w", "x"], "answer": "w"},
+  {"question": "Cut off", "options": ["w", "x", "y"
+"""
+
+
+def test_json_parser_handles_strings_nesting_and_split_points():
+    for size in (1, 3, 17, 10000):
+        rejected = []
+        parser = JSONStreamParser(mcq_repair, rejected)
+        questions = feed_in_pieces(parser, JSON_TEXT, size)
+        assert [q["question"] for q in questions] == ['Which {brace} is "quoted"?', "Nested"]
+        assert questions[0]["answer"] == "a}"
+        # Invalid JSON, a schema violation and the truncated tail
+        assert len(rejected) == 3
+        assert parser.invalid == 3
+
+
+def test_json_parser_ignores_text_outside_objects():
+    parser = JSONStreamParser(mcq_repair)
+    assert parser.feed("```\n[]\n```\nNo questions, sorry.") == []
+    assert parser.close() == [] and parser.invalid == 0